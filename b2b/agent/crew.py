@@ -8,32 +8,33 @@ from utils.state_manager import state_manager
 from tools.schedule_meeting import ScheduleMeetingTool
 from tools.get_meeting_preview import ScheduleMeetingPreviewTool
 from utils.fetch_chat_history import FetchChatHistoryTool
+from utils import chat_events
+
+try:
+    from crewai.events import crewai_event_bus, LLMStreamChunkEvent, TaskStartedEvent, ToolUsageStartedEvent
+except ImportError:
+    from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent, TaskStartedEvent, ToolUsageStartedEvent
 
 load_dotenv()
 
-def create_crew(question, thread_id: str = None):
-    llm = LLM(model='azure/gpt4-o')
-    hotel_agent = Agent(
-        role='Teamspace Agent',
-        goal=(
-            "Answer the given question using your tools without modifying the question itself. Please make sure to follow the instructions in the task description. Do not perform any actions outside the scope of the task."
-        ),
-        backstory=(
-            "You are the Meeting Assistant Agent for TeamSpace. You have access to a language model "
-            "and a set of tools to help answer questions and assist with meeting scheduling."
-        ),
-        verbose=True,
-        llm=llm,
-        logging_level=logging.INFO,
-        tools=[ScheduleMeetingTool(thread_id), ScheduleMeetingPreviewTool(thread_id)],
-    )
-    flow_state = state_manager.get_states_as_string(thread_id)
-    chat_history_task = Task(
-        description=
-            f"""
+AGENT_DEFINITION = dict(
+    role='Teamspace Agent',
+    goal=(
+        "Answer the given question using your tools without modifying the question itself. Please make sure to follow the instructions in the task description. Do not perform any actions outside the scope of the task."
+    ),
+    backstory=(
+        "You are the Meeting Assistant Agent for TeamSpace. You have access to a language model "
+        "and a set of tools to help answer questions and assist with meeting scheduling."
+    ),
+    verbose=True,
+    logging_level=logging.INFO,
+)
+
+# Prompt skeletons; {question}, {flow_state} and {today} are bound per chat turn
+CHAT_HISTORY_PROMPT = """
             User message: {question}
             Current flow state: [{flow_state}]
-            Current year: { date.today().isoformat() }
+            Current year: {today}
 
             # Message Aggregator Assistant
 
@@ -62,17 +63,10 @@ def create_crew(question, thread_id: str = None):
 
             4. Deliver only the final summarized message in your chat_response
             """
-        ,
-        agent=hotel_agent,
-        expected_output=(
-            "Well structured message that captures all crucial information (ids, dates, time topic, duration, etc.) "
-        ),
-    )
-    agent_task = Task(
-        description=
-            f"""
+
+AGENT_TASK_PROMPT = """
             ** Current flow state: [{flow_state}] **
-            ** Current year: { date.today().isoformat() } **
+            ** Current year: {today} **
 
             # Meeting Scheduling Assistant
 
@@ -113,16 +107,86 @@ def create_crew(question, thread_id: str = None):
             - Keep URLs in tool_response only
             - Do not include flow_state in chat_response
             """
-        ,
-        agent=hotel_agent,
-        context=[chat_history_task],
-        expected_output=f"The output should follow the schema below: {CrewOutput.model_json_schema()}.",
-        memory=True,
-        output_pydantic=CrewOutput
-    )
-    choreo_crew = Crew(
-    agents=[hotel_agent],
-    tasks=[chat_history_task, agent_task],
-    process=Process.sequential
-    )
-    return choreo_crew.kickoff()
+
+CHAT_HISTORY_EXPECTED_OUTPUT = (
+    "Well structured message that captures all crucial information (ids, dates, time topic, duration, etc.) "
+)
+
+
+class CrewFactory:
+    """
+    Builds the crew for a chat turn. The LLM client, agent definition, prompt
+    skeletons and output schema are prepared once per process; each call only
+    binds the thread's tools and the question, flow state and date. Agents and
+    tasks hold per-run state in crewai, so they are still created per call.
+    Streaming turns get their own streaming LLM, so its chunk events can be
+    told apart from those of concurrent turns.
+    """
+
+    def __init__(self, model: str = 'azure/gpt4-o'):
+        self.model = model
+        self.llm = LLM(model=model)
+        self.agent_expected_output = f"The output should follow the schema below: {CrewOutput.model_json_schema()}."
+
+    def create(self, question: str, thread_id: str = None, stream: bool = False) -> Crew:
+        hotel_agent = Agent(
+            **AGENT_DEFINITION,
+            llm=LLM(model=self.model, stream=True) if stream else self.llm,
+            tools=[ScheduleMeetingTool(thread_id), ScheduleMeetingPreviewTool(thread_id)],
+        )
+        flow_state = state_manager.get_states_as_string(thread_id)
+        today = date.today().isoformat()
+        chat_history_task = Task(
+            name="chat_history_task",
+            description=CHAT_HISTORY_PROMPT.format(question=question, flow_state=flow_state, today=today),
+            agent=hotel_agent,
+            expected_output=CHAT_HISTORY_EXPECTED_OUTPUT,
+        )
+        agent_task = Task(
+            name="agent_task",
+            description=AGENT_TASK_PROMPT.format(flow_state=flow_state, today=today),
+            agent=hotel_agent,
+            context=[chat_history_task],
+            expected_output=self.agent_expected_output,
+            memory=True,
+            output_pydantic=CrewOutput
+        )
+        return Crew(
+            agents=[hotel_agent],
+            tasks=[chat_history_task, agent_task],
+            process=Process.sequential
+        )
+
+
+# Depending on the crewai version, listeners run on the thread executing the crew
+# or on the event bus' own pool, so the stream is found through the emitting task,
+# LLM or tool executor that create_crew bound to it
+@crewai_event_bus.on(TaskStartedEvent)
+def on_task_started(source, event):
+    stream = chat_events.stream_for(source)
+    if stream is not None:
+        stream.current_task = getattr(source, "name", None)
+        stream.publish("task_start", {"task": stream.current_task})
+
+@crewai_event_bus.on(ToolUsageStartedEvent)
+def on_tool_usage_started(source, event):
+    stream = chat_events.stream_for(source, getattr(source, "task", None))
+    if stream is not None:
+        stream.publish("tool_call", {"tool": event.tool_name, "args": event.tool_args})
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def on_llm_stream_chunk(source, event):
+    stream = chat_events.stream_for(source)
+    if stream is not None:
+        task = getattr(event, "task_name", None) or stream.current_task
+        stream.publish("token", {"task": task, "text": event.chunk})
+
+
+# Single instance for application-wide use
+crew_factory = CrewFactory()
+
+def create_crew(question, thread_id: str = None, stream: bool = False):
+    crew = crew_factory.create(question, thread_id, stream)
+    owners = [*crew.tasks, *(agent.llm for agent in crew.agents)] if stream else []
+    with chat_events.bind(chat_events.current_stream.get(), *owners):
+        return crew.kickoff()
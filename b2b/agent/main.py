@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import os
+from contextlib import asynccontextmanager
 from typing import List, Optional
 from dotenv import load_dotenv
 from langchain_openai import AzureChatOpenAI
@@ -8,14 +10,20 @@ from fastapi import FastAPI, HTTPException, Depends, Header, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 import jwt
-from jwt.exceptions import InvalidTokenError
+from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, Response as HTTPResponse
 from utils.constants import FlowState
 from utils.state_manager import state_manager
+from utils.state_backend import state_backend
 from utils.asgardeo_manager import AuthCode, asgardeo_manager
 from utils.chat_history import ChatHistory, chat_history_manager
-from fastapi.responses import JSONResponse
+from utils.token_cache import TokenCache
+from utils.jwks import create_token_verifier
+from utils.metrics import registry, timed, RequestTimingMiddleware, PROMETHEUS_CONTENT_TYPE
+from utils.chat_executor import ChatCapacityError, ChatExecutor
+from utils.chat_events import ChatEventStream, current_stream
+from fastapi.responses import ORJSONResponse
 import urllib3
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -25,7 +33,18 @@ load_dotenv(override=True)
 os.makedirs('logs', exist_ok=True)
 logging.config.fileConfig('logging.conf', disable_existing_loggers=False)
 
-app = FastAPI(title="LLM Chat API")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Worker startup and shutdown"""
+    if token_verifier:
+        # Load the signing keys before the first request needs them
+        await asyncio.to_thread(token_verifier.key_store.start)
+    yield
+    chat_executor.shutdown()
+    if token_verifier:
+        token_verifier.key_store.stop()
+
+app = FastAPI(title="LLM Chat API", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -35,20 +54,42 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestTimingMiddleware)
 
 security = HTTPBearer()
+token_cache = TokenCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", 1024)))
+token_verifier = create_token_verifier()
+chat_executor = ChatExecutor(
+    max_concurrency=int(os.getenv("CHAT_MAX_CONCURRENCY", 4)),
+    queue_timeout=float(os.getenv("CHAT_QUEUE_TIMEOUT", 30)),
+)
+
+def decode_token(token: str) -> dict:
+    """Decode a bearer token, verifying its signature when a JWKS is configured"""
+    if token_verifier:
+        return token_verifier.decode(token)
+    # PyJWT skips the expiry check along with the signature unless asked for it
+    return jwt.decode(token, options={"verify_signature": False, "verify_exp": True})
 
 def get_user_from_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         logging.info("Validating user token")
         token = credentials.credentials
         logging.info(f"Token received: {token}")
-        payload = jwt.decode(token, options={"verify_signature": False})
+        payload = token_cache.get(token)
+        if payload is None:
+            payload = decode_token(token)
+            token_cache.put(token, payload, payload.get("exp"))
         user_id = payload.get("sub")
         logging.info(f"User ID extracted from token: {user_id}")
         asgardeo_manager.store_user_claims(user_id, payload)
         logging.info(f"User claims stored for user ID: {user_id}")
         return user_id
+    except ExpiredSignatureError:
+        raise HTTPException(
+            status_code=401,
+            detail="Authentication token has expired"
+        )
     except InvalidTokenError:
         raise HTTPException(
             status_code=401,
@@ -69,43 +110,91 @@ class ChatResponse(BaseModel):
     response: Response
     message_states: List[str]
 
+def run_chat_turn(user_message: str, thread_id: Optional[str], user_id: str, stream: bool = False) -> ChatResponse:
+    """Run one chat turn end to end; blocking, so it runs on the chat executor"""
+    asgardeo_manager.fetch_agent_token()
+
+    # Bookkeeping writes are buffered so they reach a shared backend together with the
+    # next read. The crew runs outside any pipeline: OAuth state and flow states written
+    # by its tools must be visible to /callback, /state and other workers immediately.
+    with state_backend.pipeline():
+        if not asgardeo_manager.get_user_id_from_thread_id(thread_id):
+            asgardeo_manager.store_user_id_against_thread_id(thread_id, user_id)
+        chat_history_manager.add_user_message(thread_id, user_message)
+    logging.info(f"User message added to chat history for thread ID: {thread_id}")
+
+    with timed("crew"):
+        crew_response = create_crew(user_message, thread_id, stream)
+    crew_dict = crew_response.to_dict()
+
+    chat_response = crew_dict.get('response', {})
+    tool_response = chat_response.get("tool_response", {})
+    tool_response_dict = tool_response.to_dict() if hasattr(tool_response, 'to_dict') else tool_response
+    response = Response(
+        chat_response=chat_response.get("chat_response", ""),
+        tool_response=tool_response_dict
+    )
+    with state_backend.pipeline():
+        chat_history_manager.add_assistant_message(thread_id, str(crew_dict))
+        message_states = [state.name for state in state_manager.get_message_states(thread_id)]
+        state_manager.clear_message_states(thread_id)
+    return ChatResponse(response=response, message_states=message_states)
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
     user_id: str = Depends(get_user_from_token),
     ThreadID: Optional[str] = Header(None)
 ):
+    thread_id = ThreadID or request.threadId
+    logging.info(f"Received chat request from user: {user_id} with thread ID: {thread_id}")
     try:
-        user_message = request.message
-        thread_id = ThreadID or request.threadId
-        logging.info(f"Received chat request from user: {user_id} with thread ID: {thread_id}")
-        if not asgardeo_manager.get_user_id_from_thread_id(thread_id):
-            asgardeo_manager.store_user_id_against_thread_id(thread_id, user_id)
-
-        asgardeo_manager.fetch_agent_token(thread_id)
-        chat_history_manager.add_user_message(thread_id, user_message)
-        logging.info(f"User message added to chat history for thread ID: {thread_id}")
-
-        crew_response = create_crew(user_message, thread_id)
-        crew_dict = crew_response.to_dict()
-        chat_history_manager.add_assistant_message(thread_id, str(crew_dict))
-
-        chat_response = crew_dict.get('response', {})
-        tool_response = chat_response.get("tool_response", {})
-        tool_response_dict = tool_response.to_dict() if hasattr(tool_response, 'to_dict') else tool_response
-        response = Response(
-            chat_response=chat_response.get("chat_response", ""),
-            tool_response=tool_response_dict
-        )
-        message_states = [state.name for state in state_manager.get_message_states(thread_id)]
-        state_manager.clear_message_states(thread_id)
-        return ChatResponse(response=response, message_states=message_states)
+        return await chat_executor.run(run_chat_turn, request.message, thread_id, user_id)
+    except ChatCapacityError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    user_id: str = Depends(get_user_from_token),
+    ThreadID: Optional[str] = Header(None)
+):
+    """
+    Same chat turn as /chat, streamed as server-sent events: `task_start`,
+    `tool_call`, `token` and `state` while the crew runs, then `response`
+    with the ChatResponse (or `error`).
+    """
+    thread_id = ThreadID or request.threadId
+    logging.info(f"Received streaming chat request from user: {user_id} with thread ID: {thread_id}")
+    stream = ChatEventStream()
+
+    async def run():
+        current_stream.set(stream)
+        try:
+            chat_response = await chat_executor.run(run_chat_turn, request.message, thread_id, user_id, True)
+            stream.publish("response", chat_response.model_dump())
+        except ChatCapacityError as e:
+            stream.publish("error", {"status": 503, "detail": str(e)})
+        except Exception as e:
+            logging.error(f"Error in streaming chat: {str(e)}")
+            stream.publish("error", {"status": 500, "detail": str(e)})
+        finally:
+            stream.close()
+
+    # The turn runs in its own task, so it completes (and records chat history)
+    # even if the client disconnects mid-stream
+    stream.task = asyncio.create_task(run())
+    return StreamingResponse(
+        stream.sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/callback")
-async def callback(
+def callback(
     code: str,
     state: str,
 ):
@@ -125,14 +214,14 @@ async def callback(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/state/{thread_id}")
-async def callback(
+def callback(
     thread_id: str
 ):
     try:
         states = {
             "states": [state.name for state in state_manager.get_states(thread_id)]
         }
-        return JSONResponse(content=states)
+        return ORJSONResponse(content=states)
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -140,3 +229,8 @@ async def callback(
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Request, crew and IdP timings in the Prometheus text exposition format"""
+    return HTTPResponse(registry.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import fakeredis
+import pytest
+
+# utils.asgardeo_manager builds its singleton from these at import time
+for name in ("CLIENT_ID", "CLIENT_SECRET", "TOKEN_URL", "AUTHORIZE_URL", "AUTHN_URL",
+             "REDIRECT_URI", "AGENT_ID", "AGENT_NAME", "AGENT_SECRET"):
+    os.environ.setdefault(name, f"test-{name.lower()}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.state_backend import RedisBackend  # noqa: E402
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis()
+
+
+@pytest.fixture
+def backend(redis_client):
+    return RedisBackend(redis_client, prefix="test")
@@ -0,0 +1,178 @@
+from datetime import datetime
+from typing import Dict
+
+import pytest
+
+from utils.asgardeo_manager import AuthCode
+from utils.chat_history import ChatHistoryManager, Message
+from utils.constants import FlowState
+from utils.state_backend import RedisBackend
+from utils.state_manager import StateManager
+
+
+def test_map_get_set_pop_contains(backend, redis_client):
+    claims = backend.map("user_claims", Dict, ttl=60)
+
+    assert claims.get("alice") is None
+    assert claims.get("alice", {}) == {}
+    assert "alice" not in claims
+    with pytest.raises(KeyError):
+        claims["alice"]
+
+    claims.set("alice", {"user_org": "org-1"})
+    assert claims.get("alice") == {"user_org": "org-1"}
+    assert claims["alice"] == {"user_org": "org-1"}
+    assert "alice" in claims
+    assert redis_client.exists("test:user_claims:alice")
+
+    assert claims.pop("alice") == {"user_org": "org-1"}
+    assert claims.pop("alice", "gone") == "gone"
+    assert "alice" not in claims
+
+
+def test_map_entries_expire_after_their_ttl(backend, redis_client):
+    tokens = backend.map("tokens", str, ttl=600)
+
+    tokens["default"] = "a"
+    tokens.set("short", "b", ttl=2.5)
+    assert 595 < redis_client.ttl("test:tokens:default") <= 600
+    # Fractional TTLs are rounded up to whole seconds
+    assert redis_client.ttl("test:tokens:short") == 3
+
+
+def test_map_set_with_non_positive_ttl_deletes_the_entry(backend):
+    claims = backend.map("user_claims", Dict, ttl=60)
+    claims.set("alice", {"user_org": "org-1"})
+
+    claims.set("alice", {"user_org": "org-2"}, ttl=0)
+    assert "alice" not in claims
+    claims.set("bob", {"user_org": "org-2"}, ttl=-5)
+    assert claims.get("bob") is None
+
+
+def test_sliding_map_get_extends_expiry(backend, redis_client):
+    threads = backend.map("thread_user_map", str, ttl=600, sliding=True)
+    threads["thread-1"] = "alice"
+    redis_client.expire("test:thread_user_map:thread-1", 5)
+
+    assert threads.get("thread-1") == "alice"
+    assert redis_client.ttl("test:thread_user_map:thread-1") > 595
+
+    # Non-sliding maps leave the expiry alone
+    fixed = backend.map("state_thread_map", str, ttl=600)
+    fixed["state-1"] = "thread-1"
+    redis_client.expire("test:state_thread_map:state-1", 5)
+    assert fixed.get("state-1") == "thread-1"
+    assert redis_client.ttl("test:state_thread_map:state-1") <= 5
+
+
+def test_list_append_trim_clear(backend, redis_client):
+    history = backend.lists("history", str, ttl=120, max_items=3)
+
+    assert history.items("thread-1") == []
+    history.append("thread-1", "a", "b")
+    history.append("thread-1", "c")
+    assert history.items("thread-1") == ["a", "b", "c"]
+
+    history.append("thread-1", "d", "e")
+    assert history.items("thread-1") == ["c", "d", "e"]
+    assert 115 < redis_client.ttl("test:history:thread-1") <= 120
+
+    history.clear("thread-1")
+    assert history.items("thread-1") == []
+    assert not redis_client.exists("test:history:thread-1")
+
+
+def test_pipeline_buffers_writes_until_the_next_read(backend, redis_client):
+    claims = backend.map("user_claims", Dict, ttl=60)
+    states = backend.lists("flow_states", str, ttl=60)
+
+    with backend.pipeline():
+        claims.set("alice", {"user_org": "org-1"})
+        states.append("thread-1", "started")
+        assert not redis_client.exists("test:user_claims:alice")
+        assert not redis_client.exists("test:flow_states:thread-1")
+
+        # The read goes out with the buffered writes and sees them
+        assert states.items("thread-1") == ["started"]
+        assert redis_client.exists("test:user_claims:alice")
+
+        claims.set("bob", {"user_org": "org-2"})
+        assert not redis_client.exists("test:user_claims:bob")
+    assert redis_client.exists("test:user_claims:bob")
+
+
+def test_pipeline_flushes_buffered_writes_when_the_block_fails(backend, redis_client):
+    claims = backend.map("user_claims", Dict, ttl=60)
+
+    with pytest.raises(RuntimeError):
+        with backend.pipeline():
+            claims.set("alice", {"user_org": "org-1"})
+            raise RuntimeError("crew failed")
+    assert claims.get("alice") == {"user_org": "org-1"}
+
+
+def test_nested_pipelines_share_the_outer_buffer(backend, redis_client):
+    claims = backend.map("user_claims", Dict, ttl=60)
+
+    with backend.pipeline():
+        with backend.pipeline():
+            claims.set("alice", {"user_org": "org-1"})
+        # Leaving the inner block does not flush
+        assert not redis_client.exists("test:user_claims:alice")
+    assert redis_client.exists("test:user_claims:alice")
+
+
+def test_writes_outside_a_pipeline_are_sent_immediately(backend, redis_client):
+    claims = backend.map("user_claims", Dict, ttl=60)
+
+    with backend.pipeline():
+        pass
+    claims.set("alice", {"user_org": "org-1"})
+    assert redis_client.exists("test:user_claims:alice")
+
+
+def test_pipeline_only_buffers_its_own_backend(backend, redis_client):
+    other = RedisBackend(redis_client, prefix="other")
+    with backend.pipeline():
+        other.map("user_claims", Dict, ttl=60).set("alice", {"user_org": "org-1"})
+        assert redis_client.exists("other:user_claims:alice")
+
+
+def test_auth_code_round_trip(backend):
+    auth_codes = backend.map("auth_codes", AuthCode, ttl=600)
+    code = AuthCode(state="state-1", user_id="alice", code=None, scopes=["openid", "create_meeting"])
+
+    auth_codes["alice_openid"] = code
+    assert auth_codes["alice_openid"] == code
+
+    code.code = "abc"
+    auth_codes["alice_openid"] = code
+    assert auth_codes.get("alice_openid").code == "abc"
+
+
+def test_flow_states_round_trip(backend):
+    manager = StateManager(backend)
+
+    manager.add_state("thread-1", FlowState.BOOKING_PREVIEW_INITIATED)
+    manager.add_state("thread-1", FlowState.BOOKING_AUTHORIZED)
+    assert manager.get_states("thread-1") == [FlowState.BOOKING_PREVIEW_INITIATED, FlowState.BOOKING_AUTHORIZED]
+    assert manager.get_states_as_string("thread-1") == "BOOKING_PREVIEW_INITIATED BOOKING_AUTHORIZED"
+
+    manager.clear_message_states("thread-1")
+    assert manager.message_states.items("thread-1") == []
+    assert len(manager.get_states("thread-1")) == 2
+
+
+def test_messages_round_trip(backend):
+    manager = ChatHistoryManager(backend, max_messages=3)
+
+    manager.add_user_message("thread-1", "Book a meeting")
+    manager.add_assistant_message("thread-1", "When?")
+    messages = manager.get_chat_history("thread-1").messages
+    assert [(m.role, m.content) for m in messages] == [("user", "Book a meeting"), ("assistant", "When?")]
+    assert all(isinstance(m, Message) and isinstance(m.timestamp, datetime) for m in messages)
+
+    for text in ("Tomorrow", "10am"):
+        manager.add_user_message("thread-1", text)
+    assert [m.content for m in manager.get_chat_history("thread-1").messages] == ["When?", "Tomorrow", "10am"]
@@ -3,12 +3,12 @@ import os
 from typing import Type, Optional
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-import requests
 import logging
 
 from schemas import CrewOutput, Response
 from utils.state_manager import state_manager
 from utils.asgardeo_manager import asgardeo_manager
+from utils.http_client import http_session
 from utils.constants import FlowState, FrontendState
 
 class ScheduleMeetingToolInput(BaseModel):
@@ -58,7 +58,7 @@ class ScheduleMeetingTool(BaseTool):
             }
 
 
-            api_response = requests.post("http://localhost:9091/meetings", json=meeting_data, headers=headers)
+            api_response = http_session.post("http://localhost:9091/meetings", json=meeting_data, headers=headers)
             if (api_response.status_code == 201):
                 meeting_details = api_response.json()
                 response_dict = {
@@ -0,0 +1,140 @@
+"""
+Process-wide cache for the agent's own access tokens.
+
+Agent tokens belong to the agent identity and the resource they were issued
+for, not to a chat thread, so one token serves every conversation until it
+nears expiry. Entries honour the IdP's `expires_in`. Once a token is inside
+its refresh window it is still served while a replacement is fetched in the
+background, and a timer refreshes tokens that were used since their last
+fetch, so active agents never wait for the three-step token flow. Concurrent
+misses for the same key share a single in-flight fetch.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+
+agent_token_fetches_total = registry.counter(
+    "agent_token_fetches_total", "Agent token fetches from the identity provider", ("reason",)
+)
+agent_token_cache_hits_total = registry.counter(
+    "agent_token_cache_hits_total", "Agent token requests served from the cache"
+)
+
+
+@dataclass
+class CachedToken:
+    token: str
+    expires_at: float
+    refresh_at: float
+    used: bool = False
+
+
+class AgentTokenCache:
+    """
+    Thread-safe token cache keyed by (agent identity, resource).
+
+    `fetch(agent_id, resource)` returns `(access_token, expires_in)`; a missing
+    `expires_in` falls back to `default_ttl`. Tokens are refreshed once
+    `refresh_ratio` of their lifetime has passed, but never later than
+    `min_margin` seconds before expiry.
+    """
+
+    def __init__(self, fetch: Callable[[str, str], Tuple[Optional[str], Optional[float]]],
+                 default_ttl: float = 300, refresh_ratio: float = 0.8, min_margin: float = 30):
+        self._fetch = fetch
+        self.default_ttl = default_ttl
+        self.refresh_ratio = refresh_ratio
+        self.min_margin = min_margin
+        self._entries: Dict[Key, CachedToken] = {}
+        self._in_flight: Dict[Key, Future] = {}
+        self._timers: Dict[Key, threading.Timer] = {}
+        self._lock = threading.Lock()
+
+        registry.gauge("agent_token_cache_size", "Agent tokens currently cached", function=lambda: len(self._entries))
+
+    def get(self, agent_id: str, resource: str) -> Optional[str]:
+        key = (agent_id, resource)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.expires_at:
+                entry.used = True
+                agent_token_cache_hits_total.inc()
+                if now >= entry.refresh_at:
+                    self._refresh_in_background(key)
+                return entry.token
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        if leader:
+            self._run_fetch(key, "miss", future)
+        return future.result()
+
+    def invalidate(self, agent_id: str, resource: str) -> None:
+        """Drop a token the resource server rejected, forcing the next `get` to fetch"""
+        key = (agent_id, resource)
+        with self._lock:
+            self._entries.pop(key, None)
+            timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _refresh_in_background(self, key: Key) -> None:
+        """Start a refresh unless a fetch for `key` is already running; called with the lock held"""
+        if key in self._in_flight:
+            return
+        future = self._in_flight[key] = Future()
+        threading.Thread(target=self._run_fetch, args=(key, "refresh", future),
+                         name="agent-token-refresh", daemon=True).start()
+
+    def _run_fetch(self, key: Key, reason: str, future: Future) -> None:
+        agent_token_fetches_total.inc(reason=reason)
+        try:
+            token, expires_in = self._fetch(*key)
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            if reason == "refresh":
+                logger.warning(f"Background agent token refresh failed: {e}")
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if token:
+                self._store(key, token, expires_in)
+        future.set_result(token)
+
+    def _store(self, key: Key, token: str, expires_in: Optional[float]) -> None:
+        ttl = float(expires_in) if expires_in else self.default_ttl
+        now = time.monotonic()
+        refresh_in = max(0.0, min(ttl * self.refresh_ratio, ttl - self.min_margin))
+        self._entries[key] = CachedToken(token=token, expires_at=now + ttl, refresh_at=now + refresh_in)
+
+        previous = self._timers.pop(key, None)
+        if previous is not None:
+            previous.cancel()
+        timer = threading.Timer(refresh_in, self._refresh_if_used, args=(key,))
+        timer.daemon = True
+        self._timers[key] = timer
+        timer.start()
+
+    def _refresh_if_used(self, key: Key) -> None:
+        """Proactively refresh tokens that served requests; idle ones are left to expire"""
+        with self._lock:
+            self._timers.pop(key, None)
+            entry = self._entries.get(key)
+            if entry is None or not entry.used:
+                return
+            self._refresh_in_background(key)
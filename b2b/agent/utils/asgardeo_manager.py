@@ -1,5 +1,6 @@
 import logging
 import os
+import time
 from typing import Dict, List, Optional
 import uuid
 import requests
@@ -7,9 +8,20 @@ from pydantic import BaseModel
 import secrets
 import base64
 import hashlib
+from utils.metrics import registry, record_time
+from utils.http_client import http_session
+from utils.agent_token_cache import AgentTokenCache
+from utils.state_backend import state_backend
 
 logger = logging.getLogger(__name__)
 
+idp_request_seconds = registry.histogram(
+    "idp_request_seconds", "Time spent in outbound calls to the identity provider", ("operation",)
+)
+
+# Resource server the agent's own token is issued for
+AGENT_TOKEN_RESOURCE = "http://localhost:9091"
+
 class AuthToken(BaseModel):
     id: str
     scopes: List[str]
@@ -43,13 +55,24 @@ class AsgardeoManager:
         self.agent_name=os.environ['AGENT_NAME']
         self.agent_secret=os.environ['AGENT_SECRET']
 
-        self.auth_codes: Dict[str, AuthCode] = {}  # Store AuthCode by session_id
-        self.auth_tokens: Dict[str, AuthToken] = {}  # Store AuthToken by token_id
-        self.agent_tokens: Dict[str, AuthToken] = {}  # Store AuthToken by token_id
-        self.thread_user_map: Dict[str, str] = {}  # Store user_id against thread_id
-        self.state_thread_map: Dict[str, str] = {}  # Store thread_id against state
-        self.state_mapping: Dict[str, AuthCode] = {}
-        self.user_claims: Dict[str, Dict] = {}
+        # Per-user and per-flow state expires and is capped so a long-running process stays bounded
+        oauth_state_ttl = float(os.getenv("OAUTH_STATE_TTL", 600))
+        self.user_token_ttl = float(os.getenv("USER_TOKEN_TTL", 3600))
+        self.user_claims_ttl = float(os.getenv("USER_CLAIMS_TTL", 3600))
+        max_entries = int(os.getenv("STATE_STORE_MAX_ENTRIES", 10000))
+
+        self.auth_codes = state_backend.map("auth_codes", AuthCode, oauth_state_ttl, max_entries)  # Store AuthCode by token key
+        self.auth_tokens = state_backend.map("auth_tokens", AuthToken, self.user_token_ttl, max_entries)  # Store AuthToken by token key
+        self.agent_tokens = AgentTokenCache(
+            self.request_agent_token,
+            default_ttl=float(os.getenv("AGENT_TOKEN_DEFAULT_TTL", 300)),
+        )  # Agent access tokens by (agent_id, resource), shared by all threads of this process
+        self.thread_user_map = state_backend.map(
+            "thread_user_map", str, float(os.getenv("THREAD_TTL", 86400)), max_entries, sliding=True
+        )  # Store user_id against thread_id
+        self.state_thread_map = state_backend.map("state_thread_map", str, oauth_state_ttl, max_entries)  # Store thread_id against state
+        self.state_mapping = state_backend.map("state_mapping", AuthCode, oauth_state_ttl, max_entries)
+        self.user_claims = state_backend.map("user_claims", Dict, self.user_claims_ttl, max_entries)
 
     def store_auth_code(self, user_id: str, code: str):
             """Store authentication code and user_id"""
@@ -69,6 +92,10 @@ class AsgardeoManager:
             with scopes passed as a list
             """
             try:
+                user_claims = self.get_user_claims(self.get_user_id_from_thread_id(thread_id))
+                if not user_claims:
+                    # The user's token expired (or its claims were evicted) since the chat request
+                    raise PermissionError("Your session has expired. Please sign in again.")
 
                 scopes_str = " ".join(scopes)
                 nonce = str(uuid.uuid4())[:16]
@@ -85,7 +112,7 @@ class AsgardeoManager:
                     f"state={state}&"
                     f"requested_actor={self.agent_id}&"
                     f"nonce={nonce}&"
-                    f"orgId={self.get_user_claims(self.get_user_id_from_thread_id(thread_id))['user_org']}&"
+                    f"orgId={user_claims['user_org']}&"
                     f"fidp=OrganizationSSO"
                 )
                 self.store_thread_id_against_state(thread_id, state)
@@ -105,40 +132,52 @@ class AsgardeoManager:
         if not code_entry:
             raise ValueError("No auth code found for user")
         try:
-            response = requests.post(
-                self.token_url,
-                data={
-                    "grant_type": "authorization_code",
-                    "code": code_entry.code,
-                    "scope": " ".join(code_entry.scopes),
-                    "redirect_uri": self.redirect_uri,
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret,
-                    "actor_token":self.agent_tokens[self.get_thread_id_from_state(state)]
-                },
-                verify=False
-            )
+            token_request = {
+                "grant_type": "authorization_code",
+                "code": code_entry.code,
+                "scope": " ".join(code_entry.scopes),
+                "redirect_uri": self.redirect_uri,
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "actor_token": self.fetch_agent_token()
+            }
+            response = self.post_to_idp("user_token", self.token_url, data=token_request)
+            if response.status_code == 401:
+                # The cached agent token was rejected (e.g. revoked before its expiry):
+                # drop it and retry once with a freshly issued one
+                logger.warning("Agent token rejected by the identity provider, fetching a new one")
+                self.agent_tokens.invalidate(self.agent_id, AGENT_TOKEN_RESOURCE)
+                token_request["actor_token"] = self.fetch_agent_token()
+                response = self.post_to_idp("user_token", self.token_url, data=token_request)
             data = response.json()
             access_token = data.get("access_token")
             token_key = self.get_token_key(code_entry.user_id, code_entry.scopes)
             token = AuthToken(id=code_entry.user_id, scopes=code_entry.scopes, token=access_token)
-            self.auth_tokens[token_key] = token
+            self.auth_tokens.set(token_key, token, ttl=float(data.get("expires_in") or self.user_token_ttl))
             return access_token
         except Exception as e:
             print(e)
             raise
 
-    def fetch_agent_token(self, thread_id: str) -> str:
+    def fetch_agent_token(self, resource: str = AGENT_TOKEN_RESOURCE) -> str:
         """
-        Exchange authorization code for access token
+        Get the agent's access token for `resource`. The token belongs to the
+        agent identity, so it is shared across threads and refreshed before it
+        expires.
+        """
+        return self.agent_tokens.get(self.agent_id, resource)
+
+    def request_agent_token(self, agent_id: str, resource: str):
+        """
+        Run the authorize -> authn -> token flow for the agent identity and
+        return the access token with its `expires_in`
         """
-        if thread_id in self.agent_tokens and self.agent_tokens[thread_id]:
-            return self.agent_tokens[thread_id]
         try:
 
             code_verifier = self.generate_code_verifier()
             code_challenge = self.generate_code_challenge(code_verifier)
-            response = requests.post(
+            response = self.post_to_idp(
+                "authorize",
                 self.authorize_url,
                 data={
                     "client_id": self.client_id,
@@ -150,9 +189,8 @@ class AsgardeoManager:
                     "response_mode": "direct",
                     "code_challenge": code_challenge,
                     "code_challenge_method": "S256",
-                    "resource": "http://localhost:9091"
-                },
-                verify=False
+                    "resource": resource
+                }
             )
             resp_json = response.json()
 
@@ -171,12 +209,12 @@ class AsgardeoManager:
                     }
                 }
             }
-            resp = requests.post(self.authn_url, json=idf_body, verify=False)
+            resp = self.post_to_idp("authn", self.authn_url, json=idf_body)
             resp_json = resp.json()
 
             code = resp_json.get("authData", {}).get("code")
             if not code:
-                return None
+                return None, None
 
             # Step 4: Get token
             token_data = {
@@ -187,22 +225,32 @@ class AsgardeoManager:
                 "code_verifier": code_verifier,
                 "redirect_uri": self.redirect_uri,
                 "scope": "openid",
-                "resource": "http://localhost:9091"
+                "resource": resource
             }
 
             headers = {"Content-Type": "application/x-www-form-urlencoded"}
-            resp = requests.post(self.token_url, data=token_data, headers=headers, verify=False)
+            resp = self.post_to_idp("agent_token", self.token_url, data=token_data, headers=headers)
 
             resp_json = resp.json()
 
-            access_token = resp_json.get("access_token")
-
-            self.agent_tokens[thread_id] = access_token
-            return access_token
+            return resp_json.get("access_token"), resp_json.get("expires_in")
         except Exception as e:
             print(e)
             raise
 
+    def post_to_idp(self, operation: str, url: str, **kwargs) -> requests.Response:
+        """
+        POST to the identity provider, timing the call per operation and
+        against the current request
+        """
+        start = time.perf_counter()
+        try:
+            return http_session.post(url, verify=False, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            idp_request_seconds.observe(elapsed, operation=operation)
+            record_time("idp", elapsed)
+
     def generate_code_verifier(self, length: int = 64) -> str:
         return secrets.token_urlsafe(length)[:length]
 
@@ -216,15 +264,15 @@ class AsgardeoManager:
         Get an access token for the app
         """
         try:
-            response = requests.post(
+            response = self.post_to_idp(
+                "app_token",
                 self.token_url,
                 data={
                     "grant_type": "client_credentials",
                     "scope": " ".join(scopes),
                     "client_id": self.client_id,
                     "client_secret": self.client_secret
-                },
-                verify=False
+                }
             )
             data = response.json()
             return data.get("access_token")
@@ -274,9 +322,12 @@ class AsgardeoManager:
 
     def store_user_claims(self, user_id: str, claims: Dict):
         """
-        Store user claims
+        Store user claims until the token they came from expires
         """
-        self.user_claims[user_id] = claims
+        ttl = self.user_claims_ttl
+        if claims.get("exp"):
+            ttl = min(ttl, max(0.0, claims["exp"] - time.time()))
+        self.user_claims.set(user_id, claims, ttl=ttl)
 
     def get_user_claims(self, user_id: str) -> Dict:
         """
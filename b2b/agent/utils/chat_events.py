@@ -0,0 +1,86 @@
+"""
+Per-request event streams for the server-sent-events chat endpoint.
+
+A streaming chat turn sets `current_stream` before it is handed to the chat
+executor; the copied context makes the stream visible to everything running
+the turn on the worker thread (tools, the state manager), which call
+`publish`. Outside a streaming turn `publish` is a no-op.
+
+crewai may run event listeners on threads of its own, so the crew factory
+also `bind`s the stream to the crew objects that emit events (tasks, the
+turn's LLM) and listeners look it up with `stream_for(source)`.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+import orjson
+
+_CLOSE = object()
+
+
+class ChatEventStream:
+    """Thread-safe queue of events for one request, drained as SSE frames on the event loop"""
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.current_task: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None  # keeps the running turn referenced
+        self.closed = False
+
+    def publish(self, event: str, data: dict) -> None:
+        if not self.closed:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, (event, data))
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, _CLOSE)
+
+    async def sse(self) -> AsyncIterator[bytes]:
+        while True:
+            item = await self._queue.get()
+            if item is _CLOSE:
+                return
+            event, data = item
+            yield b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+current_stream: ContextVar[Optional[ChatEventStream]] = ContextVar("current_stream", default=None)
+
+
+def publish(event: str, **data) -> None:
+    """Send an event to the streaming chat turn being run, if any"""
+    stream = current_stream.get()
+    if stream is not None:
+        stream.publish(event, data)
+
+
+# Streams of the running turns by id() of the crew objects bound to them
+_bound_streams: Dict[int, ChatEventStream] = {}
+
+
+@contextmanager
+def bind(stream: Optional[ChatEventStream], *owners: Any) -> Iterator[None]:
+    """Route events emitted by `owners` to `stream` until the block exits"""
+    keys = [id(owner) for owner in owners] if stream is not None else []
+    for key in keys:
+        _bound_streams[key] = stream
+    try:
+        yield
+    finally:
+        for key in keys:
+            _bound_streams.pop(key, None)
+
+
+def stream_for(*owners: Any) -> Optional[ChatEventStream]:
+    """The stream bound to the first of `owners` that has one, else the current turn's stream"""
+    for owner in owners:
+        if owner is not None:
+            stream = _bound_streams.get(id(owner))
+            if stream is not None:
+                return stream
+    return current_stream.get()
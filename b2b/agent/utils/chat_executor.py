@@ -0,0 +1,86 @@
+"""
+Bounded executor for the blocking chat pipeline.
+
+Crew kickoff, the LLM calls behind it and the IdP token requests are all
+synchronous. Running them on the event loop stalls every other endpoint, so
+chat turns run on a dedicated thread pool sized by `CHAT_MAX_CONCURRENCY`.
+Requests beyond that wait for a slot for up to `CHAT_QUEUE_TIMEOUT` seconds
+(0 waits indefinitely) and are then rejected with `ChatCapacityError`.
+"""
+
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from utils.metrics import registry, record_time
+
+T = TypeVar("T")
+
+chat_queue_wait_seconds = registry.histogram(
+    "chat_queue_wait_seconds", "Time chat requests waited for a free executor slot"
+)
+chat_rejected_total = registry.counter(
+    "chat_rejected_total", "Chat requests rejected because no executor slot freed up in time"
+)
+
+
+class ChatCapacityError(Exception):
+    """Raised when no chat slot became free within the queue timeout"""
+
+
+class ChatExecutor:
+    """
+    Runs blocking callables on a thread pool of `max_concurrency` workers,
+    admitting at most that many at once. The caller's context variables
+    (such as the request timings) are carried over to the worker thread.
+    """
+
+    def __init__(self, max_concurrency: int = 4, queue_timeout: float = 30):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="chat")
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        registry.gauge("chat_in_flight", "Chat turns currently running", function=lambda: self.in_flight)
+        registry.gauge("chat_waiting", "Chat requests waiting for an executor slot", function=lambda: self.waiting)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running loop rather than the import-time one
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        slots = self._semaphore()
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            if self.queue_timeout > 0:
+                await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+            else:
+                await slots.acquire()
+        except asyncio.TimeoutError:
+            chat_rejected_total.inc()
+            raise ChatCapacityError(f"All {self.max_concurrency} chat slots are busy")
+        finally:
+            self.waiting -= 1
+            waited = time.perf_counter() - start
+            chat_queue_wait_seconds.observe(waited)
+            record_time("chat_queue", waited)
+
+        self.in_flight += 1
+        try:
+            context = contextvars.copy_context()
+            call = functools.partial(context.run, fn, *args, **kwargs)
+            return await asyncio.get_running_loop().run_in_executor(self._pool, call)
+        finally:
+            self.in_flight -= 1
+            slots.release()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
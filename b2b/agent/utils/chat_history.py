@@ -2,7 +2,8 @@ from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 from datetime import datetime
 import logging
-from threading import Lock
+
+from utils.state_backend import StateBackend, state_backend
 
 @dataclass
 class Message:
@@ -42,58 +43,32 @@ class ChatHistory:
         )
 
 class ChatHistoryManager:
-    def __init__(self, max_threads: int = 1000, thread_timeout_hours: int = 24):
-        self.chat_histories: Dict[str, ChatHistory] = {}
+    def __init__(self, backend: StateBackend, max_threads: int = 1000, thread_timeout_hours: int = 24,
+                 max_messages: int = 100):
+        # Threads not written to for thread_timeout_hours expire; beyond max_threads the
+        # least recently used thread is dropped (in-memory backend)
         self.max_threads = max_threads
         self.thread_timeout_hours = thread_timeout_hours
-        self.lock = Lock()
-        self.last_access: Dict[str, datetime] = {}
-
-    def _cleanup_old_threads(self) -> None:
-        """Remove threads that haven't been accessed in thread_timeout_hours"""
-        current_time = datetime.now()
-        with self.lock:
-            threads_to_remove = [
-                thread_id for thread_id, last_access in self.last_access.items()
-                if (current_time - last_access).total_seconds() > self.thread_timeout_hours * 3600
-            ]
-            for thread_id in threads_to_remove:
-                del self.chat_histories[thread_id]
-                del self.last_access[thread_id]
+        self.max_messages = max_messages
+        self.messages = backend.lists(
+            "chat_history", Message, thread_timeout_hours * 3600, maxsize=max_threads, max_items=max_messages
+        )
 
     def get_chat_history(self, thread_id: str) -> ChatHistory:
-        with self.lock:
-            if len(self.chat_histories) >= self.max_threads:
-                self._cleanup_old_threads()
-                if len(self.chat_histories) >= self.max_threads:
-                    raise RuntimeError("Maximum number of active threads reached")
-                
-            if thread_id not in self.chat_histories:
-                self.chat_histories[thread_id] = ChatHistory()
-            
-            self.last_access[thread_id] = datetime.now()
-            return self.chat_histories[thread_id]
+        return ChatHistory(messages=self.messages.items(thread_id), max_messages=self.max_messages)
 
     def add_user_message(self, thread_id: str, message: str) -> None:
-        chat_history = self.get_chat_history(thread_id)
-        chat_history.add_user_message(message)
+        self.messages.append(thread_id, Message(role="user", content=message))
 
     def add_assistant_message(self, thread_id: str, message: str) -> None:
-        chat_history = self.get_chat_history(thread_id)
-        chat_history.add_assistant_message(message)
+        self.messages.append(thread_id, Message(role="assistant", content=message))
 
     def get_thread_messages_as_string(self, thread_id: str) -> str:
-        with self.lock:
-            if thread_id not in self.chat_histories:
-                return ""
-            self.last_access[thread_id] = datetime.now()
-            return self.chat_histories[thread_id].get_messages_as_string()
+        return self.get_chat_history(thread_id).get_messages_as_string()
 
     def remove_thread(self, thread_id: str) -> None:
         """Manually remove a thread from history"""
-        with self.lock:
-            self.chat_histories.pop(thread_id, None)
-            self.last_access.pop(thread_id, None)
+        self.messages.clear(thread_id)
 
 # Single instance for application-wide use
-chat_history_manager = ChatHistoryManager()
\ No newline at end of file
+chat_history_manager = ChatHistoryManager(state_backend)
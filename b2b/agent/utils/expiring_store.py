@@ -0,0 +1,107 @@
+"""
+Size- and time-bounded key/value store for per-user and per-flow state.
+
+Entries expire after the store's TTL (or a per-entry TTL, e.g. a token's
+`expires_in`) and the least recently used entries are evicted once the store
+holds `maxsize` items. Expired entries are dropped on access and by a sweep
+that runs at most every `sweep_interval` seconds during writes.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+
+from utils.metrics import registry
+
+V = TypeVar("V")
+
+store_entries = registry.gauge("store_entries", "Entries held per expiring store", ("store",))
+store_evictions_total = registry.counter(
+    "store_evictions_total", "Entries removed from expiring stores before being deleted", ("store", "reason")
+)
+
+
+class ExpiringStore(Generic[V]):
+    """
+    Thread-safe dict-like store with per-entry expiry and LRU eviction.
+
+    With `sliding=True` reading an entry extends its lifetime by the store
+    TTL, for state that should live as long as it is in use.
+    """
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 10000,
+                 sliding: bool = False, sweep_interval: float = 60):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.sliding = sliding
+        self.sweep_interval = sweep_interval
+        self._entries: "OrderedDict[Hashable, Tuple[V, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        store_entries.set(0, store=name)
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[V]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if now >= expires_at:
+                self._remove(key, "expired")
+                return default
+            self._entries.move_to_end(key)
+            if self.sliding:
+                self._entries[key] = (value, max(expires_at, now + self.ttl))
+            return value
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (value, now + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest, "capacity")
+            store_entries.set(len(self._entries), store=self.name)
+
+    def pop(self, key: Hashable, default: Any = None) -> Optional[V]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            store_entries.set(len(self._entries), store=self.name)
+        if entry is None or now >= entry[1]:
+            return default
+        return entry[0]
+
+    def __getitem__(self, key: Hashable) -> V:
+        marker = object()
+        value = self.get(key, marker)
+        if value is marker:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: V) -> None:
+        self.set(key, value)
+
+    def __contains__(self, key: Hashable) -> bool:
+        marker = object()
+        return self.get(key, marker) is not marker
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable, reason: str) -> None:
+        # Called with the lock held
+        del self._entries[key]
+        store_evictions_total.inc(store=self.name, reason=reason)
+        store_entries.set(len(self._entries), store=self.name)
+
+    def _sweep(self, now: float) -> None:
+        self._last_sweep = now
+        for key in [key for key, (_, expires_at) in self._entries.items() if now >= expires_at]:
+            self._remove(key, "expired")
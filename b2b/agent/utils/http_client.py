@@ -0,0 +1,83 @@
+"""
+Shared HTTP client for outbound calls to the identity provider and the
+meeting service.
+
+One `requests.Session` per process keeps connections alive between calls, so
+the authorize, authn and token requests of an agent token flow reuse a single
+TLS connection. Connection pools are capped per host, every request gets a
+default timeout, and failures that cannot have reached the server (connect
+errors) are retried with exponential backoff. Gateway answers (502/503/504)
+are retried for idempotent methods only: a 502 or 504 may come back after the
+upstream already handled the request, and authorization codes, token
+exchanges and meeting bookings are POSTs that must not be submitted twice.
+Read timeouts are never retried for the same reason.
+"""
+
+import os
+from http.cookiejar import DefaultCookiePolicy
+from typing import Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class TimeoutSession(requests.Session):
+    """Session that applies a default timeout to requests that do not set one"""
+
+    def __init__(self, timeout: Timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(
+    pool_maxsize: int = 10,
+    connect_timeout: float = 5,
+    read_timeout: float = 30,
+    retries: int = 2,
+    backoff_factor: float = 0.2,
+    retry_statuses: Tuple[int, ...] = (502, 503, 504),
+) -> requests.Session:
+    """
+    Build a pooled session. `pool_maxsize` bounds the open connections per
+    host; callers beyond it wait for a free connection instead of opening more.
+    """
+    session = TimeoutSession(timeout=(connect_timeout, read_timeout))
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        status_forcelist=retry_statuses,
+        # Connect errors are retried for every method; status retries only for these
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        backoff_factor=backoff_factor,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, pool_block=True, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Calls made on behalf of different users and threads must not share cookies
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def session_from_env() -> requests.Session:
+    return create_session(
+        pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", 10)),
+        connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", 5)),
+        read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", 30)),
+        retries=int(os.getenv("HTTP_RETRIES", 2)),
+        backoff_factor=float(os.getenv("HTTP_RETRY_BACKOFF", 0.2)),
+    )
+
+
+# Single instance for application-wide use
+http_session = session_from_env()
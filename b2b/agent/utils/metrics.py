@@ -0,0 +1,280 @@
+"""
+Minimal in-process metrics: counters, gauges and histograms with labels.
+
+Metrics register themselves with a MetricsRegistry, which can be served as
+a JSON `snapshot()` or in the Prometheus text exposition format.
+
+RequestTimingMiddleware records per-route request latency, plus the time
+each request spent in named components (database, IdP calls, ...) as
+reported through `record_time()` / `timed()` while the request runs.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, description: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Dict[LabelValues, object]:
+        raise NotImplementedError
+
+    def snapshot(self) -> List[dict]:
+        return [
+            {"labels": dict(zip(self.labelnames, label_values)), "value": value}
+            for label_values, value in self.samples().items()
+        ]
+
+    def exposition(self) -> List[str]:
+        """Sample lines in the Prometheus text format"""
+        return [
+            f"{self.name}{format_labels(self.labelnames, label_values)} {format_value(value)}"
+            for label_values, value in self.samples().items()
+        ]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, description, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge(Metric):
+    """A gauge that is either set explicitly or read from a callback at snapshot time"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, description: str, labelnames: Iterable[str] = (),
+                 function: Optional[Callable[[], Optional[float]]] = None):
+        super().__init__(name, description, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> Dict[LabelValues, float]:
+        if self._function is not None:
+            value = self._function()
+            return {} if value is None else {(): value}
+        with self._lock:
+            return dict(self._values)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Dict[LabelValues, dict]:
+        with self._lock:
+            return {
+                key: {
+                    "buckets": dict(zip(self.buckets, state[:-2])),
+                    "count": state[-2],
+                    "sum": state[-1],
+                }
+                for key, state in self._values.items()
+            }
+
+    def exposition(self) -> List[str]:
+        lines = []
+        labelnames = self.labelnames + ("le",)
+        for label_values, sample in self.samples().items():
+            # Bucket counts are already cumulative
+            for bound, count in sample["buckets"].items():
+                labels = format_labels(labelnames, label_values + (format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = format_labels(labelnames, label_values + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {sample['count']}")
+            labels = format_labels(self.labelnames, label_values)
+            lines.append(f"{self.name}_sum{labels} {format_value(sample['sum'])}")
+            lines.append(f"{self.name}_count{labels} {sample['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, description, labelnames))
+
+    def gauge(self, name: str, description: str, labelnames: Iterable[str] = (),
+              function: Optional[Callable[[], Optional[float]]] = None) -> Gauge:
+        return self.register(Gauge(name, description, labelnames, function))
+
+    def histogram(self, name: str, description: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, description, labelnames, buckets))
+
+    def metrics(self) -> List[Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self) -> Dict[str, List[dict]]:
+        return {metric.name: metric.snapshot() for metric in self.metrics()}
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {escape(metric.description)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.exposition())
+        return "\n".join(lines) + "\n"
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labelnames: Tuple[str, ...], label_values: LabelValues) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{name}="{escape(value)}"' for name, value in zip(labelnames, label_values))
+    return "{" + pairs + "}"
+
+
+def format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+# Single registry for application-wide use
+registry = MetricsRegistry()
+
+# Per-request component timings, set by RequestTimingMiddleware for the duration of a request
+request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "Total time spent handling a request", ("method", "route", "status")
+)
+http_request_component_seconds = registry.histogram(
+    "http_request_component_seconds", "Time a request spent in a component (db, idp, crew, ...)",
+    ("method", "route", "component")
+)
+
+
+def record_time(component: str, seconds: float) -> None:
+    """Attribute `seconds` to `component` for the request being handled, if any"""
+    timings = request_timings.get()
+    if timings is not None:
+        timings[component] = timings.get(component, 0.0) + seconds
+
+
+@contextmanager
+def timed(component: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_time(component, time.perf_counter() - start)
+
+
+class RequestTimingMiddleware:
+    """
+    ASGI middleware recording request latency per route template, status
+    and component. Unmatched paths share one label to bound cardinality.
+    """
+
+    def __init__(self, app, exclude: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        timings: Dict[str, float] = {}
+        token = request_timings.set(timings)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_timings.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            http_request_duration_seconds.observe(elapsed, method=method, route=route, status=str(status_code))
+            for component, seconds in timings.items():
+                http_request_component_seconds.observe(seconds, method=method, route=route, component=component)
@@ -0,0 +1,247 @@
+"""
+Storage backends for the agent's conversation and OAuth flow state.
+
+`StateManager`, `ChatHistoryManager` and `AsgardeoManager` keep their state in
+keyed maps and per-key lists obtained from a `StateBackend`:
+
+- `MemoryBackend` (default) keeps them in this process, bounded by TTLs and
+  size caps. Only suitable for a single worker.
+- `RedisBackend` keeps them in Redis so every worker and pod sees the same
+  flows; an OAuth `/callback` can land on any process. Requires `redis`
+  (`pip install redis`); entry limits are left to Redis' eviction policy.
+
+Select one with `STATE_BACKEND=memory|redis` and `REDIS_URL`. Inside
+`backend.pipeline()`, Redis writes are buffered and sent together with the
+next read (or when the block exits), so a chat turn costs a few round trips
+instead of one per operation.
+"""
+
+import logging
+import math
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Generic, Hashable, Iterator, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import TypeAdapter
+
+from utils.expiring_store import ExpiringStore
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+class StateBackend:
+    """Factory for the named maps and lists the managers keep their state in"""
+
+    def map(self, name: str, value_type: Type[V], ttl: float, maxsize: int = 10000,
+            sliding: bool = False) -> "ExpiringStore[V]":
+        """
+        A dict-like map (`get`, `set(key, value, ttl)`, `pop`, `[]`, `in`) whose
+        entries expire after `ttl` seconds
+        """
+        raise NotImplementedError
+
+    def lists(self, name: str, item_type: Type[V], ttl: float, maxsize: int = 10000,
+              max_items: Optional[int] = None) -> "ListStore[V]":
+        """Per-key lists, kept `ttl` seconds after the last append and capped to the newest `max_items`"""
+        raise NotImplementedError
+
+    @contextmanager
+    def pipeline(self) -> Iterator[None]:
+        """Batch the operations made in this block where the backend supports it"""
+        yield
+
+
+class ListStore(Generic[V]):
+    def append(self, key: Hashable, *items: V) -> None:
+        raise NotImplementedError
+
+    def items(self, key: Hashable) -> List[V]:
+        raise NotImplementedError
+
+    def clear(self, key: Hashable) -> None:
+        raise NotImplementedError
+
+
+class MemoryListStore(ListStore[V]):
+    def __init__(self, name: str, ttl: float, maxsize: int, max_items: Optional[int]):
+        self._store: ExpiringStore[List[V]] = ExpiringStore(name, ttl, maxsize)
+        self.max_items = max_items
+        self._lock = threading.Lock()
+
+    def append(self, key: Hashable, *items: V) -> None:
+        with self._lock:
+            values = self._store.get(key) or []
+            values.extend(items)
+            if self.max_items is not None:
+                del values[:-self.max_items]
+            self._store.set(key, values)
+
+    def items(self, key: Hashable) -> List[V]:
+        with self._lock:
+            return list(self._store.get(key) or [])
+
+    def clear(self, key: Hashable) -> None:
+        self._store.pop(key)
+
+
+class MemoryBackend(StateBackend):
+    def map(self, name, value_type, ttl, maxsize=10000, sliding=False):
+        return ExpiringStore(name, ttl, maxsize, sliding=sliding)
+
+    def lists(self, name, item_type, ttl, maxsize=10000, max_items=None):
+        return MemoryListStore(name, ttl, maxsize, max_items)
+
+
+Command = Tuple[str, tuple, dict]
+
+# Redis writes buffered by the innermost `RedisBackend.pipeline()` block of this context
+_pending: ContextVar[Optional[Tuple["RedisBackend", List[Command]]]] = ContextVar("pending_redis_writes", default=None)
+
+
+def expiry_seconds(ttl: float) -> int:
+    return max(1, math.ceil(ttl))
+
+
+class RedisMap(Generic[V]):
+    """Dict-like view of the `prefix:name:*` keys, values stored as JSON"""
+
+    def __init__(self, backend: "RedisBackend", name: str, value_type: Type[V], ttl: float, sliding: bool):
+        self._backend = backend
+        self.name = name
+        self.ttl = ttl
+        self.sliding = sliding
+        self._adapter = TypeAdapter(value_type)
+
+    def _key(self, key: Hashable) -> str:
+        return self._backend.key(self.name, key)
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[V]:
+        if self.sliding:
+            raw = self._backend.read("getex", self._key(key), ex=expiry_seconds(self.ttl))
+        else:
+            raw = self._backend.read("get", self._key(key))
+        return default if raw is None else self._adapter.validate_json(raw)
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            self._backend.write("delete", self._key(key))
+            return
+        self._backend.write("set", self._key(key), self._adapter.dump_json(value), ex=expiry_seconds(ttl))
+
+    def pop(self, key: Hashable, default: Any = None) -> Optional[V]:
+        raw = self._backend.read("getdel", self._key(key))
+        return default if raw is None else self._adapter.validate_json(raw)
+
+    def __getitem__(self, key: Hashable) -> V:
+        raw = self._backend.read("get", self._key(key))
+        if raw is None:
+            raise KeyError(key)
+        return self._adapter.validate_json(raw)
+
+    def __setitem__(self, key: Hashable, value: V) -> None:
+        self.set(key, value)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return bool(self._backend.read("exists", self._key(key)))
+
+
+class RedisListStore(ListStore[V]):
+    def __init__(self, backend: "RedisBackend", name: str, item_type: Type[V], ttl: float, max_items: Optional[int]):
+        self._backend = backend
+        self.name = name
+        self.ttl = ttl
+        self.max_items = max_items
+        self._adapter = TypeAdapter(item_type)
+
+    def append(self, key: Hashable, *items: V) -> None:
+        redis_key = self._backend.key(self.name, key)
+        self._backend.write("rpush", redis_key, *(self._adapter.dump_json(item) for item in items))
+        if self.max_items is not None:
+            self._backend.write("ltrim", redis_key, -self.max_items, -1)
+        self._backend.write("expire", redis_key, expiry_seconds(self.ttl))
+
+    def items(self, key: Hashable) -> List[V]:
+        raw_items = self._backend.read("lrange", self._backend.key(self.name, key), 0, -1)
+        return [self._adapter.validate_json(raw) for raw in raw_items]
+
+    def clear(self, key: Hashable) -> None:
+        self._backend.write("delete", self._backend.key(self.name, key))
+
+
+class RedisBackend(StateBackend):
+    def __init__(self, client, prefix: str = "agent"):
+        self.client = client
+        self.prefix = prefix
+
+    def key(self, name: str, key: Hashable) -> str:
+        return f"{self.prefix}:{name}:{key}"
+
+    def map(self, name, value_type, ttl, maxsize=10000, sliding=False):
+        return RedisMap(self, name, value_type, ttl, sliding)
+
+    def lists(self, name, item_type, ttl, maxsize=10000, max_items=None):
+        return RedisListStore(self, name, item_type, ttl, max_items)
+
+    def _buffer(self) -> Optional[List[Command]]:
+        pending = _pending.get()
+        return pending[1] if pending is not None and pending[0] is self else None
+
+    def _execute(self, commands: List[Command]) -> list:
+        pipe = self.client.pipeline(transaction=False)
+        for method, args, kwargs in commands:
+            getattr(pipe, method)(*args, **kwargs)
+        return pipe.execute()
+
+    def write(self, method: str, *args, **kwargs) -> None:
+        buffer = self._buffer()
+        if buffer is None:
+            getattr(self.client, method)(*args, **kwargs)
+        else:
+            buffer.append((method, args, kwargs))
+
+    def read(self, method: str, *args, **kwargs):
+        buffer = self._buffer()
+        if not buffer:
+            return getattr(self.client, method)(*args, **kwargs)
+        # Send the buffered writes ahead of the read in the same round trip
+        commands = buffer[:] + [(method, args, kwargs)]
+        buffer.clear()
+        return self._execute(commands)[-1]
+
+    @contextmanager
+    def pipeline(self) -> Iterator[None]:
+        if self._buffer() is not None:
+            yield
+            return
+        buffer: List[Command] = []
+        token = _pending.set((self, buffer))
+        try:
+            yield
+        finally:
+            _pending.reset(token)
+            if buffer:
+                self._execute(buffer)
+
+
+def create_backend() -> StateBackend:
+    kind = os.getenv("STATE_BACKEND", "memory")
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("STATE_BACKEND=redis requires the redis package (pip install redis)")
+        client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        logger.info("Using Redis state backend")
+        return RedisBackend(client, prefix=os.getenv("REDIS_KEY_PREFIX", "agent"))
+    raise ValueError(f"Unknown STATE_BACKEND: {kind}")
+
+
+# Single instance for application-wide use
+state_backend = create_backend()
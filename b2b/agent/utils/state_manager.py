@@ -1,67 +1,42 @@
-from dataclasses import dataclass, field
-from typing import List, Dict
-from enum import Enum
+import os
+from typing import List
 import logging
 
 from utils.constants import FlowState
-
-@dataclass
-class FlowStates:
-    states: List[FlowState] = field(default_factory=list)
-
-    def add_state(self, state: FlowState) -> None:
-        """Add a state to the list of states."""
-        self.states.append(state)
-
-    def get_states(self) -> List[FlowState]:
-        """Return the list of states."""
-        return self.states
-
-    def get_states_as_string(self) -> str:
-        """Return the states as a formatted string."""
-        return " ".join(state.name for state in self.states)
+from utils import chat_events
+from utils.state_backend import StateBackend, state_backend
 
 class StateManager:
-    def __init__(self) -> None:
-        """Initialize the StateManager with an empty dictionary for thread states."""
-        self.thread_states: Dict[int, FlowStates] = {}
-        self.message_states: Dict[int, FlowStates] = {}
+    def __init__(self, backend: StateBackend, thread_ttl: float = 86400) -> None:
+        """Initialize the StateManager with per-thread state lists in the given backend."""
+        self.thread_states = backend.lists("flow_states", FlowState, thread_ttl)
+        self.message_states = backend.lists("message_states", FlowState, thread_ttl)
 
     def add_state(self, thread_id: int, state: FlowState) -> None:
         """Add a state to the flow states for a specific thread."""
-        if thread_id not in self.thread_states:
-            self.thread_states[thread_id] = FlowStates()
-            self.message_states[thread_id] = FlowStates()
-        self.thread_states[thread_id].add_state(state)
-        self.message_states[thread_id].add_state(state)
+        self.thread_states.append(thread_id, state)
+        self.message_states.append(thread_id, state)
+        chat_events.publish("state", state=state.name)
 
     def clear_state(self, thread_id: int) -> None:
         """Add a state to the flow states for a specific thread."""
-        if thread_id in self.thread_states:
-            self.thread_states[thread_id].states = []
+        self.thread_states.clear(thread_id)
 
     def get_states(self, thread_id: int) -> List[FlowState]:
         """Return the list of states for a specific thread."""
-        if thread_id in self.thread_states:
-            return self.thread_states[thread_id].get_states()
-        return []
+        return self.thread_states.items(thread_id)
 
     def get_states_as_string(self, thread_id: int) -> str:
         """Return the states as a formatted string for a specific thread."""
-        if thread_id in self.thread_states:
-            return self.thread_states[thread_id].get_states_as_string()
-        return ""
+        return " ".join(state.name for state in self.get_states(thread_id))
 
     def get_message_states(self, thread_id: int) -> List[FlowState]:
         """Return the list of states for a specific message."""
-        if thread_id in self.thread_states:
-            return self.thread_states[thread_id].get_states()
-        return []
+        return self.thread_states.items(thread_id)
 
     def clear_message_states(self, thread_id: int) -> None:
         """Clear the message states for a specific thread."""
-        if thread_id in self.message_states:
-            self.message_states[thread_id].states = []
+        self.message_states.clear(thread_id)
 
 # Single instance for application-wide use
-state_manager = StateManager()
+state_manager = StateManager(state_backend, thread_ttl=float(os.getenv("THREAD_TTL", 86400)))
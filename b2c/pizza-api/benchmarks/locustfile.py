@@ -0,0 +1,66 @@
+"""
+Locust load profile for a running Pizza Shack API.
+
+Uses the same token shapes as the in-process benchmarks; seed the target
+database first with `python -m benchmarks.seed`. Requires `pip install locust`:
+
+    locust -f benchmarks/locustfile.py --host http://localhost:8000 \
+        --users 100 --spawn-rate 20 --run-time 2m --headless --csv bench
+"""
+
+import random
+
+from locust import HttpUser, between, task
+
+from benchmarks.seed import user_ids
+from benchmarks.tokens import TokenFactory
+
+tokens = TokenFactory()
+USERS = user_ids(50)
+
+
+class Customer(HttpUser):
+    """An agent-assisted customer browsing the menu and placing orders"""
+
+    wait_time = between(0.1, 0.5)
+
+    def on_start(self):
+        user_id = random.choice(USERS)
+        self.client.headers["Authorization"] = f"Bearer {tokens.obo(user_id)}"
+        self.menu_etag = None
+
+    @task(5)
+    def menu(self):
+        headers = {"If-None-Match": self.menu_etag} if self.menu_etag else {}
+        with self.client.get("/api/menu", headers=headers, name="/api/menu", catch_response=True) as response:
+            if response.status_code in (200, 304):
+                self.menu_etag = response.headers.get("etag", self.menu_etag)
+                response.success()
+
+    @task(2)
+    def list_orders(self):
+        self.client.get("/api/orders?limit=20", name="/api/orders")
+
+    @task(1)
+    def create_order(self):
+        self.client.post("/api/orders", name="/api/orders [POST]", json={
+            "items": [{"menu_item_id": random.randint(1, 5), "quantity": random.randint(1, 3)}],
+        })
+
+
+class Admin(HttpUser):
+    """Back-office dashboards polling order listings and reports"""
+
+    weight = 1
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        self.client.headers["Authorization"] = f"Bearer {tokens.admin()}"
+
+    @task(3)
+    def orders(self):
+        self.client.get("/api/admin/orders?limit=50", name="/api/admin/orders")
+
+    @task(1)
+    def top_items(self):
+        self.client.get("/api/admin/reports/top-items?days=7", name="/api/admin/reports/top-items")
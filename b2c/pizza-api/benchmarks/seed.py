@@ -0,0 +1,92 @@
+"""
+Bulk order seeding for benchmarks.
+
+Inserts `count` orders spread over `users` users and the last `days` days,
+in chunks through the sync session, so listing, pagination, export and
+report endpoints run against a realistically sized table.
+
+Run standalone to seed the database named by DATABASE_URL, e.g. before
+benchmarking a live server:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.seed --orders 100000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+
+def user_ids(users: int) -> List[str]:
+    return [f"bench-user-{i:04d}" for i in range(users)]
+
+
+def seed_orders(count: int, users: int = 50, days: int = 30, batch_size: int = 1000,
+                seed: int = 0) -> List[Tuple[str, str]]:
+    """Insert `count` orders and return their (user_id, order_id) pairs"""
+    import main as api
+
+    api.init_database()
+    rng = random.Random(seed)
+    owners = user_ids(users)
+    now = datetime.now(timezone.utc)
+    seeded = []
+
+    with api.SessionLocal() as db:
+        # Plain tuples, so commits below don't expire them
+        menu_items = [(item.id, item.name, item.price) for item in db.query(api.MenuItem)]
+        for start in range(0, count, batch_size):
+            orders = []
+            for _ in range(min(batch_size, count - start)):
+                user_id = rng.choice(owners)
+                created_at = now - timedelta(seconds=rng.uniform(0, days * 86400))
+                lines = []
+                for position, (menu_item_id, name, price) in enumerate(rng.sample(menu_items, rng.randint(1, 3))):
+                    quantity = rng.randint(1, 3)
+                    lines.append(api.OrderLine(
+                        position=position,
+                        menu_item_id=menu_item_id,
+                        name=name,
+                        quantity=quantity,
+                        size=rng.choice(["small", "medium", "large"]),
+                        unit_price=price,
+                        total_price=price * quantity,
+                    ))
+                order = api.Order(
+                    order_id=api.order_id_generator.generate(),
+                    user_id=user_id,
+                    agent_id="pizza-agent",
+                    customer_info={},
+                    items=lines,
+                    total_amount=sum(line.total_price for line in lines),
+                    status="confirmed",
+                    token_type="obo",
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+                orders.append(order)
+                seeded.append((user_id, order.order_id))
+            db.add_all(orders)
+            db.commit()
+            db.expunge_all()
+
+    return seeded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the Pizza Shack database with benchmark orders")
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    seed_orders(args.orders, args.users, args.days, args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"Seeded {args.orders} orders in {elapsed:.1f}s ({args.orders / elapsed:.0f} orders/s)")
+
+
+if __name__ == "__main__":
+    main()
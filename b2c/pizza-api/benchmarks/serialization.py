@@ -0,0 +1,125 @@
+"""
+Order serialization benchmark.
+
+Compares encoding order listings the way FastAPI does for a `response_model`
+(re-validate the returned models, walk them through `jsonable_encoder` into
+dicts, then encode) with the stdlib `JSONResponse` and with `ORJSONResponse`,
+against the serialize-once path the order endpoints use (`encode_orders`:
+pydantic-core validates from the ORM objects and writes JSON bytes directly).
+The second table starts from already-built response models, isolating the
+encoding cost from reading the ORM attributes.
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --sizes 1 50 200 --repeat 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+
+def build_orders(count: int, lines: int = 3):
+    """Transient orders with loaded line items, shaped like query results"""
+    import main as api
+
+    now = datetime.now(timezone.utc)
+    orders = []
+    for i in range(count):
+        items = [
+            api.OrderLine(
+                position=position,
+                menu_item_id=position + 1,
+                name="Margherita Classic",
+                quantity=2,
+                size="large",
+                unit_price=10.99,
+                total_price=21.98,
+                special_instructions="Extra basil, cut into squares" if position == 0 else None,
+            )
+            for position in range(lines)
+        ]
+        orders.append(api.Order(
+            id=i + 1,
+            order_id=api.order_id_generator.generate(),
+            user_id=f"bench-user-{i % 50:04d}",
+            agent_id="pizza-agent",
+            customer_info={},
+            items=items,
+            total_amount=21.98 * lines,
+            status="confirmed",
+            token_type="obo",
+            created_at=now - timedelta(minutes=i),
+        ))
+    return orders
+
+
+def fastapi_path(response_class, from_orm: bool = True) -> Callable[[list], bytes]:
+    """Encode like a `response_model=List[OrderResponse]` endpoint returning models"""
+    import main as api
+
+    field = create_response_field(name="Response_orders", type_=List[api.OrderResponse], mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def encode(orders) -> bytes:
+        models = [api.order_to_response(order) for order in orders] if from_orm else orders
+        content = loop.run_until_complete(serialize_response(field=field, response_content=models))
+        return response_class(content).body
+
+    return encode
+
+
+def time_per_call(encode: Callable[[list], bytes], orders: list, repeat: int) -> float:
+    encode(orders)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode(orders)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare order JSON serialization paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 50, 200], help="orders per payload")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    import main as api
+
+    stages = {
+        "ORM objects -> bytes": {
+            "fastapi+json": fastapi_path(JSONResponse),
+            "fastapi+orjson": fastapi_path(ORJSONResponse),
+            "serialize_once": api.encode_orders,
+        },
+        "response models -> bytes": {
+            "fastapi+json": fastapi_path(JSONResponse, from_orm=False),
+            "fastapi+orjson": fastapi_path(ORJSONResponse, from_orm=False),
+            "serialize_once": api.ORDER_LIST_ADAPTER.dump_json,
+        },
+    }
+
+    for stage, paths in stages.items():
+        print(stage)
+        print(f"{'orders':>6} {'path':<16} {'median ms':>10} {'speedup':>8} {'bytes':>8}")
+        for size in args.sizes:
+            orders = build_orders(size)
+            if stage.startswith("response models"):
+                orders = [api.order_to_response(order) for order in orders]
+            baseline = None
+            for name, encode in paths.items():
+                seconds = time_per_call(encode, orders, args.repeat)
+                baseline = baseline or seconds
+                print(f"{size:>6} {name:<16} {seconds * 1000:>10.3f} {baseline / seconds:>7.1f}x {len(encode(orders)):>8}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
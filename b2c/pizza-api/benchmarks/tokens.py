@@ -0,0 +1,107 @@
+"""
+Token factory for benchmarks.
+
+Mints agent, OBO and user JWTs in the shapes `verify_token` classifies:
+
+- agent: `grant_type=client_credentials`, the agent as `sub`
+- obo:   user as `sub`, the acting agent in the `act` claim
+- user:  user as `sub`, the SPA client as `azp`
+
+Tokens are HS256-signed by default, which the API accepts when no JWKS is
+configured. `TokenFactory.with_rsa_key()` signs with a throwaway RS256 key
+instead and can write the matching JWKS file, so signature verification is
+part of what gets measured.
+"""
+
+import json
+import time
+import uuid
+from typing import Any, Dict, Iterable, Optional
+
+import jwt
+
+AGENT_GRANT_TYPE = "client_credentials"
+
+AGENT_SCOPES = ("pizza:read", "pizza:order")
+OBO_SCOPES = ("pizza:read", "pizza:order")
+USER_SCOPES = ("pizza:read", "pizza:order")
+ADMIN_SCOPES = ("pizza:read", "admin:read")
+
+
+class TokenFactory:
+    def __init__(
+        self,
+        signing_key: Any = "benchmark-secret",
+        algorithm: str = "HS256",
+        kid: Optional[str] = None,
+        issuer: str = "https://api.asgardeo.io/t/pizzashack/oauth2/token",
+        client_id: str = "pizza-shack-spa",
+        agent_id: str = "pizza-agent",
+        lifetime: int = 3600,
+    ):
+        self.signing_key = signing_key
+        self.algorithm = algorithm
+        self.kid = kid
+        self.issuer = issuer
+        self.client_id = client_id
+        self.agent_id = agent_id
+        self.lifetime = lifetime
+
+    @classmethod
+    def with_rsa_key(cls, kid: str = "benchmark", **kwargs) -> "TokenFactory":
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        return cls(signing_key=private_key, algorithm="RS256", kid=kid, **kwargs)
+
+    def jwks(self) -> Dict[str, Any]:
+        """Public JWKS for an RSA-signing factory"""
+        if self.algorithm != "RS256":
+            raise ValueError("JWKS is only available for RS256 factories")
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self.signing_key.public_key()))
+        jwk.update({"kid": self.kid, "use": "sig", "alg": self.algorithm})
+        return {"keys": [jwk]}
+
+    def write_jwks(self, path: str) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.jwks(), f)
+        return path
+
+    def mint(self, claims: Dict[str, Any]) -> str:
+        now = int(time.time())
+        payload = {
+            "iss": self.issuer,
+            "iat": now,
+            "exp": now + self.lifetime,
+            "jti": uuid.uuid4().hex,
+            **claims,
+        }
+        headers = {"kid": self.kid} if self.kid else None
+        return jwt.encode(payload, self.signing_key, algorithm=self.algorithm, headers=headers)
+
+    def agent(self, scopes: Iterable[str] = AGENT_SCOPES) -> str:
+        return self.mint({
+            "sub": self.agent_id,
+            "aud": self.agent_id,
+            "grant_type": AGENT_GRANT_TYPE,
+            "scope": " ".join(scopes),
+        })
+
+    def obo(self, user_id: str, scopes: Iterable[str] = OBO_SCOPES) -> str:
+        return self.mint({
+            "sub": user_id,
+            "aud": self.agent_id,
+            "act": {"sub": self.agent_id},
+            "scope": " ".join(scopes),
+        })
+
+    def user(self, user_id: str, scopes: Iterable[str] = USER_SCOPES) -> str:
+        return self.mint({
+            "sub": user_id,
+            "aud": self.client_id,
+            "azp": self.client_id,
+            "scope": " ".join(scopes),
+        })
+
+    def admin(self, user_id: str = "admin") -> str:
+        return self.user(user_id, scopes=ADMIN_SCOPES)
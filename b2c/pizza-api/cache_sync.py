@@ -0,0 +1,70 @@
+"""
+Cross-worker cache invalidation through version counters in the database.
+
+Each worker process keeps its own in-memory caches. Writers bump a named
+counter in the same transaction as their change; every worker polls the
+counters and invalidates the local caches whose counter moved. A change
+made by any worker, `manage.py` or a SQL script that bumps the counter
+reaches all workers within one poll interval.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+cache_remote_invalidations_total = registry.counter(
+    "cache_remote_invalidations_total", "Local cache invalidations triggered by a shared version change", ("cache",)
+)
+
+
+class CacheVersionPoller:
+    """Invalidates registered caches when their shared version counter changes"""
+
+    def __init__(self, read_versions: Callable[[], Awaitable[Dict[str, int]]], interval: float = 5):
+        self._read_versions = read_versions
+        self.interval = interval
+        self._callbacks: Dict[str, List[Callable[[], None]]] = {}
+        self._versions: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, invalidate: Callable[[], None]) -> None:
+        self._callbacks.setdefault(name, []).append(invalidate)
+
+    async def start(self) -> None:
+        """Record the current versions and poll in the background (no-op if the interval is 0)"""
+        self._versions = await self._read_versions()
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run(), name="cache-version-poller")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def poll(self) -> List[str]:
+        """Read the counters once and invalidate caches whose version changed"""
+        versions = await self._read_versions()
+        changed = [name for name, version in versions.items() if self._versions.get(name) != version]
+        self._versions = versions
+        for name in changed:
+            for invalidate in self._callbacks.get(name, []):
+                invalidate()
+            cache_remote_invalidations_total.inc(cache=name)
+        return changed
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.warning(f"Cache version poll failed: {e}")
@@ -1,5 +1,5 @@
 -- Pizza Shack Database Schema
--- Creates tables for menu items and orders
+-- Creates tables for menu items, orders and order items
 
 -- Menu Items Table
 CREATE TABLE IF NOT EXISTS menu_items (
@@ -9,8 +9,8 @@ CREATE TABLE IF NOT EXISTS menu_items (
     price DECIMAL(10,2) NOT NULL,
     category VARCHAR(50) NOT NULL,
     image_url VARCHAR(200),
-    ingredients TEXT,  -- JSON string
-    size_options TEXT, -- JSON string
+    ingredients JSONB,  -- JSON array
+    size_options JSONB, -- JSON array
     available BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -21,8 +21,7 @@ CREATE TABLE IF NOT EXISTS orders (
     order_id VARCHAR(50) UNIQUE NOT NULL,
     user_id VARCHAR(100),  -- From OBO token
     agent_id VARCHAR(100), -- From agent token
-    customer_info TEXT,    -- JSON string
-    items TEXT,           -- JSON string
+    customer_info JSONB,   -- JSON object
     total_amount DECIMAL(10,2),
     status VARCHAR(20) DEFAULT 'pending',
     token_type VARCHAR(20), -- 'agent' or 'obo'
@@ -30,6 +29,44 @@ CREATE TABLE IF NOT EXISTS orders (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Order Items Table (one row per order line; name and prices snapshotted at order time)
+CREATE TABLE IF NOT EXISTS order_items (
+    id SERIAL PRIMARY KEY,
+    order_id INTEGER NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    menu_item_id INTEGER NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    quantity INTEGER NOT NULL,
+    size VARCHAR(20),
+    unit_price DOUBLE PRECISION NOT NULL,
+    total_price DOUBLE PRECISION NOT NULL,
+    special_instructions TEXT
+);
+
+-- Idempotency Keys Table (replays retried POST /api/orders requests)
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id VARCHAR(100) NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    request_hash VARCHAR(64) NOT NULL,
+    order_id INTEGER NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, key)
+);
+
+-- Schema Version Table (checked by the API workers at startup; see manage.py)
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO schema_version (version) SELECT 2 WHERE NOT EXISTS (SELECT 1 FROM schema_version WHERE version = 2);
+
+-- Cache Versions Table (bumped on menu changes; API workers poll it to invalidate their caches)
+CREATE TABLE IF NOT EXISTS cache_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+INSERT INTO cache_versions (name, version) SELECT 'menu', 0 WHERE NOT EXISTS (SELECT 1 FROM cache_versions WHERE name = 'menu');
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_menu_items_category ON menu_items(category);
 CREATE INDEX IF NOT EXISTS idx_menu_items_available ON menu_items(available);
@@ -37,6 +74,10 @@ CREATE INDEX IF NOT EXISTS idx_orders_user_id ON orders(user_id);
 CREATE INDEX IF NOT EXISTS idx_orders_agent_id ON orders(agent_id);
 CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);
 CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders(created_at);
+CREATE INDEX IF NOT EXISTS idx_orders_user_id_created_at ON orders(user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_created_at_id ON orders(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items(order_id);
+CREATE INDEX IF NOT EXISTS idx_order_items_menu_item_id ON order_items(menu_item_id);
 
 -- Create function to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -8,5 +8,9 @@ DROP TRIGGER IF EXISTS update_orders_updated_at ON orders;
 DROP FUNCTION IF EXISTS update_updated_at_column();
 
 -- Drop tables (order matters due to dependencies)
+DROP TABLE IF EXISTS cache_versions CASCADE;
+DROP TABLE IF EXISTS schema_version CASCADE;
+DROP TABLE IF EXISTS idempotency_keys CASCADE;
+DROP TABLE IF EXISTS order_items CASCADE;
 DROP TABLE IF EXISTS orders CASCADE;
 DROP TABLE IF EXISTS menu_items CASCADE;
\ No newline at end of file
@@ -0,0 +1,43 @@
+-- Migration 001 (PostgreSQL): normalize order items and switch JSON text columns to JSONB
+-- Moves the JSON `orders.items` blob into `order_items` rows and converts
+-- `orders.customer_info`, `menu_items.ingredients` and `menu_items.size_options` to JSONB.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS order_items (
+    id SERIAL PRIMARY KEY,
+    order_id INTEGER NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    menu_item_id INTEGER NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    quantity INTEGER NOT NULL,
+    size VARCHAR(20),
+    unit_price DOUBLE PRECISION NOT NULL,
+    total_price DOUBLE PRECISION NOT NULL,
+    special_instructions TEXT
+);
+
+INSERT INTO order_items (order_id, position, menu_item_id, name, quantity, size, unit_price, total_price, special_instructions)
+SELECT
+    o.id,
+    line.ordinality - 1,
+    (line.value->>'menu_item_id')::INTEGER,
+    line.value->>'name',
+    (line.value->>'quantity')::INTEGER,
+    line.value->>'size',
+    (line.value->>'unit_price')::DOUBLE PRECISION,
+    (line.value->>'total_price')::DOUBLE PRECISION,
+    line.value->>'special_instructions'
+FROM orders o
+CROSS JOIN LATERAL jsonb_array_elements(o.items::JSONB) WITH ORDINALITY AS line(value, ordinality)
+WHERE o.items IS NOT NULL AND o.items <> '';
+
+CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items(order_id);
+CREATE INDEX IF NOT EXISTS idx_order_items_menu_item_id ON order_items(menu_item_id);
+
+ALTER TABLE orders DROP COLUMN items;
+ALTER TABLE orders ALTER COLUMN customer_info TYPE JSONB USING NULLIF(customer_info, '')::JSONB;
+ALTER TABLE menu_items ALTER COLUMN ingredients TYPE JSONB USING NULLIF(ingredients, '')::JSONB;
+ALTER TABLE menu_items ALTER COLUMN size_options TYPE JSONB USING NULLIF(size_options, '')::JSONB;
+
+COMMIT;
@@ -0,0 +1,39 @@
+-- Migration 001 (SQLite): normalize order items
+-- Moves the JSON `orders.items` blob into `order_items` rows.
+-- JSON columns stay TEXT on SQLite. Requires SQLite 3.35+ for DROP COLUMN.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS order_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id INTEGER NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    menu_item_id INTEGER NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    quantity INTEGER NOT NULL,
+    size VARCHAR(20),
+    unit_price REAL NOT NULL,
+    total_price REAL NOT NULL,
+    special_instructions TEXT
+);
+
+INSERT INTO order_items (order_id, position, menu_item_id, name, quantity, size, unit_price, total_price, special_instructions)
+SELECT
+    o.id,
+    CAST(line.key AS INTEGER),
+    json_extract(line.value, '$.menu_item_id'),
+    json_extract(line.value, '$.name'),
+    json_extract(line.value, '$.quantity'),
+    json_extract(line.value, '$.size'),
+    json_extract(line.value, '$.unit_price'),
+    json_extract(line.value, '$.total_price'),
+    json_extract(line.value, '$.special_instructions')
+FROM orders o, json_each(o.items) AS line
+WHERE o.items IS NOT NULL AND o.items <> '';
+
+CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items(order_id);
+CREATE INDEX IF NOT EXISTS idx_order_items_menu_item_id ON order_items(menu_item_id);
+
+ALTER TABLE orders DROP COLUMN items;
+
+COMMIT;
@@ -12,4 +12,7 @@ INSERT INTO menu_items (name, description, price, category, image_url, ingredien
 
 ('Veggie Garden', 'Fresh vegetables including bell peppers, mushrooms, onions, and olives', 11.99, 'vegetarian', '/images/veggie.jpg', '["Bell peppers", "Mushrooms", "Red onions", "Black olives", "Mozzarella", "Tomato sauce"]', '["Small ($9.99)", "Medium ($11.99)", "Large ($13.99)"]', TRUE)
 
-ON CONFLICT (name) DO NOTHING;
\ No newline at end of file
+ON CONFLICT (name) DO NOTHING;
+
+-- Let running API workers pick up the new menu
+UPDATE cache_versions SET version = version + 1 WHERE name = 'menu';
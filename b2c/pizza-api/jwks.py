@@ -0,0 +1,164 @@
+"""
+JWT signature verification against an Asgardeo JWKS endpoint.
+
+The key set is fetched once, parsed into public keys indexed by `kid` and
+refreshed in the background, so verifying a token only costs a dictionary
+lookup and one signature check. An unknown `kid` triggers an on-demand
+refresh (rate limited) to pick up rotated keys. `source` may be an HTTP(S)
+URL, a `file://` URL or a plain path to a JWKS JSON file.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from typing import Dict, Iterable, Optional
+
+import jwt
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSKeyStore:
+    """Parsed JWKS public keys indexed by `kid`"""
+
+    def __init__(
+        self,
+        source: str,
+        refresh_interval: float = 3600,
+        min_refresh_interval: float = 30,
+        timeout: float = 5,
+    ):
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self._keys: Dict[Optional[str], jwt.PyJWK] = {}
+        self._last_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+        self._started = False
+        self._stop = threading.Event()
+
+    def get_key(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        """
+        Return the public key for `kid`. An unknown `kid` waits for any refresh
+        in progress, then refreshes once unless the last refresh finished less
+        than `min_refresh_interval` ago.
+        """
+        if not self._started:
+            self.start()
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        with self._refresh_lock:
+            key = self._keys.get(kid)
+            if key is None and time.monotonic() - self._last_refresh >= self.min_refresh_interval:
+                self._refresh()
+                key = self._keys.get(kid)
+        return key
+
+    def start(self) -> None:
+        """Load the key set and start the background refresh thread"""
+        with self._refresh_lock:
+            if self._started:
+                return
+            # Concurrent first verifications wait on the lock until the keys are loaded
+            self._refresh()
+            self._started = True
+        threading.Thread(target=self._refresh_loop, name="jwks-refresh", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def refresh(self) -> bool:
+        """Fetch and parse the key set, keeping the previous keys on failure"""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self) -> bool:
+        # Called with the refresh lock held; `_last_refresh` marks when the attempt finished
+        try:
+            jwks = self._fetch()
+        except Exception as e:
+            logger.error(f"Failed to load JWKS from {self.source}: {e}")
+            return False
+        finally:
+            self._last_refresh = time.monotonic()
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            if jwk.get("use", "sig") != "sig":
+                continue
+            try:
+                keys[jwk.get("kid")] = jwt.PyJWK(jwk)
+            except jwt.PyJWTError as e:
+                logger.warning(f"Skipping unusable JWK {jwk.get('kid')}: {e}")
+        self._keys = keys
+        logger.info(f"Loaded {len(keys)} signing keys from {self.source}")
+        return True
+
+    def _fetch(self) -> dict:
+        if self.source.startswith(("http://", "https://")):
+            with urllib.request.urlopen(self.source, timeout=self.timeout) as response:
+                return json.load(response)
+        path = self.source.removeprefix("file://")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+
+class TokenVerifier:
+    """Decodes JWTs, verifying signatures with keys from a JWKSKeyStore"""
+
+    def __init__(
+        self,
+        key_store: JWKSKeyStore,
+        issuer: Optional[str] = None,
+        audience: Optional[str] = None,
+        algorithms: Iterable[str] = ("RS256",),
+        leeway: float = 0,
+    ):
+        self.key_store = key_store
+        self.issuer = issuer
+        self.audience = audience
+        self.algorithms = list(algorithms)
+        self.leeway = leeway
+
+    def decode(self, token: str) -> dict:
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+        if algorithm not in self.algorithms:
+            raise jwt.InvalidAlgorithmError(f"Algorithm {algorithm} is not allowed")
+        key = self.key_store.get_key(header.get("kid"))
+        if key is None:
+            raise jwt.InvalidTokenError(f"No signing key found for kid {header.get('kid')}")
+        return jwt.decode(
+            token,
+            key.key,
+            algorithms=[algorithm],
+            audience=self.audience,
+            issuer=self.issuer,
+            leeway=self.leeway,
+            options={"verify_aud": self.audience is not None},
+        )
+
+
+def create_token_verifier() -> Optional[TokenVerifier]:
+    """Build a verifier from the JWKS_URL / JWT_ISSUER / JWT_AUDIENCE environment, if configured"""
+    jwks_url = os.getenv("JWKS_URL")
+    if not jwks_url:
+        return None
+    key_store = JWKSKeyStore(
+        jwks_url,
+        refresh_interval=float(os.getenv("JWKS_REFRESH_INTERVAL", 3600)),
+    )
+    return TokenVerifier(
+        key_store,
+        issuer=os.getenv("JWT_ISSUER"),
+        audience=os.getenv("JWT_AUDIENCE"),
+        algorithms=os.getenv("JWT_ALGORITHMS", "RS256").split(","),
+    )
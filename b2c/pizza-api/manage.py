@@ -0,0 +1,58 @@
+"""
+One-shot database management for the Pizza Shack API.
+
+    python manage.py migrate   # apply pending db/migrations scripts, create missing tables, record the version
+    python manage.py seed      # insert the default menu if there is none
+    python manage.py init      # migrate, then seed
+    python manage.py check     # exit non-zero unless the schema matches this build
+
+Run this once per deployment (a pre-deploy job or the container entrypoint)
+before starting the API workers, which only verify the schema version.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+import main
+
+logger = logging.getLogger("manage")
+
+
+def migrate() -> None:
+    version = main.migrate_database()
+    logger.info(f"Database schema is at version {version}")
+
+
+def seed() -> None:
+    main.seed_menu()
+
+
+def init() -> None:
+    migrate()
+    seed()
+
+
+def check() -> None:
+    asyncio.run(main.verify_schema())
+    logger.info(f"Database schema is at version {main.SCHEMA_VERSION}")
+
+
+COMMANDS = {"migrate": migrate, "seed": seed, "init": init, "check": check}
+
+
+def run(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pizza Shack database management")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args(argv)
+    try:
+        COMMANDS[args.command]()
+    except Exception as e:
+        logger.error(f"{args.command} failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
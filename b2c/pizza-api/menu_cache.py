@@ -0,0 +1,125 @@
+"""
+In-process cache for the public pizza menu.
+
+The menu only changes when it is seeded or edited by an admin, so reads are
+served from a decoded snapshot that is rebuilt lazily whenever the cache
+version moves past the version the snapshot was built from. Each filter
+combination is also kept as encoded response bytes with a strong ETag.
+"""
+
+import asyncio
+import hashlib
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Price buckets used by the `price_range` filter: (exclusive lower, inclusive upper)
+PRICE_RANGES: Dict[str, Tuple[Optional[float], Optional[float]]] = {
+    "budget": (None, 11.50),
+    "mid-range": (11.50, 13.00),
+    "premium": (13.00, None),
+}
+
+
+def price_range_for(price: float) -> Optional[str]:
+    """Return the price bucket a price falls into"""
+    for name, (lower, upper) in PRICE_RANGES.items():
+        if (lower is None or price > lower) and (upper is None or price <= upper):
+            return name
+    return None
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag derived from the encoded response body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, RFC 9110)"""
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class MenuCache:
+    """
+    Holds the available menu items pre-indexed by category and price range.
+
+    `loader` is a coroutine function returning the list of available items
+    (objects exposing `category` and `price`) and `encoder` turns a list of
+    items into response bytes. Writers call `invalidate()` to bump the
+    version; the next read reloads the snapshot.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[List[Any]]], encoder: Callable[[List[Any]], bytes]):
+        self._loader = loader
+        self._encoder = encoder
+        self._lock = threading.Lock()
+        self._load_lock = asyncio.Lock()
+        self._version = 0
+        self._loaded_version: Optional[int] = None
+        # (index, encoded bodies) swapped as a single tuple so readers never mix snapshots
+        self._state: Tuple[Dict[Tuple[Optional[str], Optional[str]], List[Any]],
+                           Dict[Tuple[Optional[str], Optional[str]], Tuple[bytes, str]]] = ({}, {})
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> None:
+        """Mark the cached snapshot as stale"""
+        with self._lock:
+            self._version += 1
+
+    async def get(self, category: Optional[str] = None, price_range: Optional[str] = None) -> List[Any]:
+        """Return the cached items matching the given filters"""
+        index, _ = await self._snapshot()
+        return index.get(self._key(category, price_range), [])
+
+    async def get_encoded(self, category: Optional[str] = None, price_range: Optional[str] = None) -> Tuple[bytes, str]:
+        """Return the encoded response body and its ETag for the given filters"""
+        index, encoded = await self._snapshot()
+        key = self._key(category, price_range)
+        entry = encoded.get(key)
+        if entry is None:
+            body = self._encoder(index.get(key, []))
+            entry = (body, etag_for(body))
+            # Unknown categories are not memoized so arbitrary query values cannot grow the cache
+            if key in index:
+                encoded[key] = entry
+        return entry
+
+    @staticmethod
+    def _key(category: Optional[str], price_range: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        category = category.lower() if category else None
+        price_range = price_range.lower() if price_range else None
+        if price_range not in PRICE_RANGES:
+            # Unknown price ranges are ignored, matching the query-based behaviour
+            price_range = None
+        return category, price_range
+
+    async def _snapshot(self):
+        if self._loaded_version == self._version:
+            return self._state
+        async with self._load_lock:
+            version = self._version
+            if self._loaded_version != version:
+                items = await self._loader()
+                self._state = (self._build_index(items), {})
+                self._loaded_version = version
+            return self._state
+
+    @staticmethod
+    def _build_index(items: List[Any]) -> Dict[Tuple[Optional[str], Optional[str]], List[Any]]:
+        index: Dict[Tuple[Optional[str], Optional[str]], List[Any]] = {(None, None): list(items)}
+        for item in items:
+            bucket = price_range_for(item.price)
+            keys = [(item.category, None)]
+            if bucket:
+                keys += [(None, bucket), (item.category, bucket)]
+            for key in keys:
+                index.setdefault(key, []).append(item)
+        return index
@@ -0,0 +1,66 @@
+"""
+Time-sortable, collision-free order IDs.
+
+IDs follow the ULID layout encoded in Crockford base32:
+
+    48-bit millisecond timestamp | 80-bit random
+
+Every process draws fresh randomness for each new millisecond and increments
+it for further IDs within the same millisecond, so IDs sort by creation time
+(keeping inserts on the unique index append-only) and processes need no
+coordination or per-worker configuration: two workers only collide if they
+draw the same 80-bit value in the same millisecond.
+"""
+
+import secrets
+import threading
+import time
+from typing import Callable
+
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+TIMESTAMP_BITS = 48
+RANDOM_BITS = 80
+ID_BITS = TIMESTAMP_BITS + RANDOM_BITS
+ID_LENGTH = (ID_BITS + 4) // 5
+
+MAX_RANDOM = (1 << RANDOM_BITS) - 1
+
+
+def encode_base32(value: int, length: int = ID_LENGTH) -> str:
+    chars = []
+    for _ in range(length):
+        chars.append(CROCKFORD_ALPHABET[value & 0x1F])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+class OrderIdGenerator:
+    """Thread-safe, monotonic ID generator for one process"""
+
+    def __init__(self, prefix: str = "ORD-", clock: Callable[[], float] = time.time):
+        self.prefix = prefix
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_timestamp = 0
+        self._random = 0
+
+    def generate(self) -> str:
+        with self._lock:
+            timestamp = int(self._clock() * 1000)
+            if timestamp > self._last_timestamp:
+                self._last_timestamp = timestamp
+                self._random = secrets.randbits(RANDOM_BITS)
+            elif self._random < MAX_RANDOM:
+                # Same millisecond, or the clock moved backwards: stay on the last timestamp
+                self._random += 1
+            else:
+                # Random part exhausted: borrow the next millisecond
+                self._last_timestamp += 1
+                self._random = secrets.randbits(RANDOM_BITS)
+            value = (self._last_timestamp << RANDOM_BITS) | self._random
+        return self.prefix + encode_base32(value)
+
+
+# Single instance for application-wide use
+order_id_generator = OrderIdGenerator()
@@ -0,0 +1,139 @@
+"""
+Group commit for order inserts.
+
+Concurrent requests hand their new rows to an OrderBatchWriter, which
+collects them for up to `max_delay` seconds (or `max_batch_size` orders)
+and inserts the whole batch in a single transaction, so a lunch-time burst
+pays one commit instead of one per order. Primary keys come back from the
+INSERT and timestamps are set client-side, so callers get complete objects
+without a refresh. If a batch fails, its orders are retried one transaction
+each so only the offending order reports the error.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from metrics import registry, timed
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+order_batch_size = registry.histogram(
+    "order_batch_size", "Orders committed per group-commit transaction", buckets=BATCH_SIZE_BUCKETS
+)
+order_batch_commit_seconds = registry.histogram(
+    "order_batch_commit_seconds", "Time spent inserting and committing one order batch"
+)
+order_batch_wait_seconds = registry.histogram(
+    "order_batch_wait_seconds", "Time an order waited from submission until its batch committed"
+)
+
+Entry = Tuple[Sequence[Any], "asyncio.Future", float]
+
+
+class OrderBatchWriter:
+    """Batches ORM objects from concurrent callers into shared transactions"""
+
+    def __init__(self, session_factory: Callable, max_batch_size: int = 64, max_delay: float = 0.005):
+        self.session_factory = session_factory
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, *objects: Any) -> None:
+        """Insert `objects` in the next batch; returns once they are committed"""
+        if self._worker is None or self._worker.done():
+            self._start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((objects, future, time.perf_counter()))
+        with timed("order_batch"):
+            await future
+
+    def _start(self) -> None:
+        self._queue = asyncio.Queue()
+        # Run in a fresh context so batch queries aren't attributed to the request that started the worker
+        self._worker = asyncio.create_task(self._run(), name="order-batch-writer", context=contextvars.Context())
+
+    async def close(self) -> None:
+        """Commit whatever is queued and stop the worker"""
+        if self._worker is None or self._worker.done():
+            return
+        await self._queue.put(None)
+        await self._worker
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            entry = await self._queue.get()
+            if entry is None:
+                break
+            batch: List[Entry] = [entry]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                try:
+                    entry = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        entry = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            await self._write(batch)
+
+    async def _write(self, batch: List[Entry]) -> None:
+        try:
+            await self._commit(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch, e)
+                return
+            logger.warning(f"Order batch of {len(batch)} failed ({type(e).__name__}), retrying orders individually")
+            for entry in batch:
+                try:
+                    await self._commit([entry])
+                except Exception as e:
+                    self._resolve([entry], e)
+                else:
+                    self._resolve([entry])
+        else:
+            self._resolve(batch)
+
+    async def _commit(self, batch: List[Entry]) -> None:
+        start = time.perf_counter()
+        async with self.session_factory() as session:
+            for objects, _future, _submitted in batch:
+                session.add_all(objects)
+            try:
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+            finally:
+                # Detach the committed objects; their loaded state stays readable
+                session.expunge_all()
+        order_batch_commit_seconds.observe(time.perf_counter() - start)
+        order_batch_size.observe(len(batch))
+
+    @staticmethod
+    def _resolve(batch: List[Entry], error: Optional[BaseException] = None) -> None:
+        now = time.perf_counter()
+        for _objects, future, submitted in batch:
+            if future.done():
+                continue
+            if error is None:
+                order_batch_wait_seconds.observe(now - submitted)
+                future.set_result(None)
+            else:
+                future.set_exception(error)
@@ -0,0 +1,120 @@
+"""
+Production entry point for the Pizza Shack API.
+
+    python serve.py                    # one worker per available CPU (or WEB_CONCURRENCY)
+    python serve.py --migrate          # run `manage.py init` once before the workers start
+    python serve.py --workers 4 --port 8080
+
+Uses uvloop and httptools when they are installed (uvicorn[standard] on
+Linux) and never enables auto-reload. On SIGTERM the server stops accepting
+connections and gives in-flight requests up to GRACEFUL_SHUTDOWN_TIMEOUT
+seconds; each worker's lifespan shutdown then commits pending order
+batches and closes its connection pool.
+
+Workers are forked with identical environments, so per-process state (such
+as the random part of order IDs) must be derived in each worker rather than
+configured here.
+"""
+
+import argparse
+import importlib.util
+import logging
+import math
+import os
+import subprocess
+import sys
+from typing import Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("serve")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def cgroup_cpu_quota() -> Optional[float]:
+    """CPU limit of the container (cgroup v2, then v1), or None when unlimited"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max", "r", encoding="utf-8") as f:
+            quota, period = f.read().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "r", encoding="utf-8") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us", "r", encoding="utf-8") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring affinity and container CPU limits"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_quota()
+    if quota:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def default_workers() -> int:
+    """WEB_CONCURRENCY if set, else one async worker per CPU up to MAX_WORKERS"""
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return max(1, int(configured))
+    return max(1, min(available_cpus(), int(os.getenv("MAX_WORKERS", 8))))
+
+
+def installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Pizza Shack API with multiple workers")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", 20)),
+                        help="seconds in-flight requests get to finish on shutdown")
+    parser.add_argument("--keep-alive", type=int, default=int(os.getenv("KEEP_ALIVE_TIMEOUT", 5)))
+    parser.add_argument("--migrate", action="store_true",
+                        help="run `manage.py init` once before starting the workers")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+
+    if args.migrate:
+        # Separate process, so the supervisor never holds application state or DB connections
+        subprocess.run([sys.executable, os.path.join(BASE_DIR, "manage.py"), "init"], check=True, cwd=BASE_DIR)
+
+    import uvicorn
+
+    loop = "uvloop" if installed("uvloop") else "asyncio"
+    http = "httptools" if installed("httptools") else "h11"
+    logger.info(f"Starting {args.workers} worker(s) on {args.host}:{args.port} (loop={loop}, http={http})")
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        reload=False,
+        lifespan="on",
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        app_dir=BASE_DIR,
+    )
+
+
+if __name__ == "__main__":
+    main()
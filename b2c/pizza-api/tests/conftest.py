@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# main reads DATABASE_URL at import time, so point it at a throwaway SQLite file first
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="pizza-api-tests-"), "test.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    main.init_database()
+    return main.app
@@ -0,0 +1,163 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import main
+from benchmarks.tokens import TokenFactory
+from jwks import JWKSKeyStore, TokenVerifier
+
+ISSUER = "https://api.asgardeo.io/t/pizzashack/oauth2/token"
+AUDIENCE = "pizza-shack-spa"
+
+
+class CountingKeyStore(JWKSKeyStore):
+    """Key store that counts key set downloads"""
+
+    fetches = 0
+
+    def _fetch(self) -> dict:
+        self.fetches += 1
+        return super()._fetch()
+
+
+@pytest.fixture(scope="module")
+def factory():
+    return TokenFactory.with_rsa_key(kid="key-1", issuer=ISSUER, client_id=AUDIENCE)
+
+
+@pytest.fixture(scope="module")
+def rotated_factory():
+    return TokenFactory.with_rsa_key(kid="key-2", issuer=ISSUER, client_id=AUDIENCE)
+
+
+@pytest.fixture
+def jwks_path(tmp_path, factory):
+    return factory.write_jwks(str(tmp_path / "jwks.json"))
+
+
+@pytest.fixture
+def key_store(jwks_path):
+    store = CountingKeyStore(jwks_path, min_refresh_interval=60)
+    yield store
+    store.stop()
+
+
+def make_verifier(key_store, **kwargs) -> TokenVerifier:
+    options = {"issuer": ISSUER, "audience": AUDIENCE, "algorithms": ["RS256"], **kwargs}
+    return TokenVerifier(key_store, **options)
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def hs256_token(claims: dict, secret: bytes, kid: str) -> str:
+    """HS256 token signed by hand: PyJWT refuses to use a PEM key as an HMAC secret"""
+    signing_input = b64url(json.dumps({"alg": "HS256", "typ": "JWT", "kid": kid}).encode()) + "." + \
+        b64url(json.dumps(claims).encode())
+    signature = hmac.new(secret, signing_input.encode("ascii"), hashlib.sha256).digest()
+    return signing_input + "." + b64url(signature)
+
+
+def test_valid_token(key_store, factory):
+    payload = make_verifier(key_store).decode(factory.user("alice"))
+    assert payload["sub"] == "alice"
+
+
+def test_bad_signature_is_rejected(key_store, factory):
+    token = factory.user("alice")
+    header, _, signature = token.split(".")
+    claims = jwt.decode(token, options={"verify_signature": False})
+    tampered = b64url(json.dumps({**claims, "sub": "mallory"}).encode())
+    with pytest.raises(jwt.InvalidSignatureError):
+        make_verifier(key_store).decode(f"{header}.{tampered}.{signature}")
+
+
+def test_token_signed_by_another_key_with_the_same_kid_is_rejected(key_store):
+    impostor = TokenFactory.with_rsa_key(kid="key-1", issuer=ISSUER, client_id=AUDIENCE)
+    with pytest.raises(jwt.InvalidSignatureError):
+        make_verifier(key_store).decode(impostor.user("alice"))
+
+
+def test_algorithm_outside_the_allowed_list_is_rejected(key_store):
+    hs_factory = TokenFactory(kid="key-1", issuer=ISSUER, client_id=AUDIENCE)
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        make_verifier(key_store).decode(hs_factory.user("alice"))
+
+
+def test_hs256_signed_with_the_public_key_is_rejected(key_store, factory, monkeypatch):
+    public_pem = factory.signing_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    now = int(time.time())
+    claims = {"sub": "mallory", "iss": ISSUER, "aud": AUDIENCE, "iat": now, "exp": now + 600}
+    token = hs256_token(claims, public_pem, kid="key-1")
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        make_verifier(key_store).decode(token)
+
+    # Even if HS256 were allowed, the RSA key is never usable as an HMAC secret
+    monkeypatch.setattr(main, "token_verifier", make_verifier(key_store, algorithms=["RS256", "HS256"]))
+    with pytest.raises(HTTPException) as error:
+        main.verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+    assert error.value.status_code == 401
+
+
+def test_unknown_kid_refreshes_and_picks_up_rotated_keys(jwks_path, rotated_factory):
+    store = CountingKeyStore(jwks_path, min_refresh_interval=0)
+    try:
+        verifier = make_verifier(store)
+        store.start()
+        rotated_factory.write_jwks(jwks_path)
+
+        assert verifier.decode(rotated_factory.user("alice"))["sub"] == "alice"
+        assert store.fetches == 2
+    finally:
+        store.stop()
+
+
+def test_unknown_kid_refreshes_are_rate_limited(key_store, jwks_path, rotated_factory):
+    verifier = make_verifier(key_store)
+    key_store.start()
+    rotated_factory.write_jwks(jwks_path)
+
+    for _ in range(3):
+        with pytest.raises(jwt.InvalidTokenError, match="No signing key"):
+            verifier.decode(rotated_factory.user("alice"))
+    assert key_store.fetches == 1
+
+    # Once the minimum interval has passed, the next unknown kid refreshes again
+    key_store.min_refresh_interval = 0
+    assert verifier.decode(rotated_factory.user("alice"))["sub"] == "alice"
+    assert key_store.fetches == 2
+
+
+def test_issuer_mismatch_is_rejected(key_store, factory):
+    with pytest.raises(jwt.InvalidIssuerError):
+        make_verifier(key_store, issuer="https://evil.example/oauth2/token").decode(factory.user("alice"))
+
+
+def test_audience_mismatch_is_rejected(key_store, factory):
+    with pytest.raises(jwt.InvalidAudienceError):
+        make_verifier(key_store, audience="another-client").decode(factory.user("alice"))
+
+
+def test_expired_token_is_a_401_from_verify_token(key_store, monkeypatch):
+    expired = TokenFactory.with_rsa_key(kid="key-1", issuer=ISSUER, client_id=AUDIENCE, lifetime=-60)
+    expired.write_jwks(key_store.source)
+    verifier = make_verifier(key_store)
+    token = expired.user("alice")
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verifier.decode(token)
+
+    monkeypatch.setattr(main, "token_verifier", verifier)
+    with pytest.raises(HTTPException) as error:
+        main.verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+    assert error.value.status_code == 401
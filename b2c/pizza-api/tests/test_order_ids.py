@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import jwt
+
+import main
+from order_ids import OrderIdGenerator
+
+
+def generate_concurrently(generator: OrderIdGenerator, threads: int, per_thread: int):
+    results = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads)
+
+    def worker(index: int):
+        barrier.wait()
+        results[index].extend(generator.generate() for _ in range(per_thread))
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return results
+
+
+def test_ids_from_many_threads_are_unique_and_sorted():
+    generator = OrderIdGenerator()
+    results = generate_concurrently(generator, threads=16, per_thread=2000)
+
+    ids = [order_id for batch in results for order_id in batch]
+    assert len(set(ids)) == len(ids)
+    # Each thread sees its IDs in creation order, and string order is creation order
+    for batch in results:
+        assert batch == sorted(batch)
+    assert all(len(order_id) == len(ids[0]) for order_id in ids)
+
+
+def test_ids_within_one_millisecond_stay_unique_and_sorted():
+    generator = OrderIdGenerator(clock=lambda: 1700000000.0)
+    results = generate_concurrently(generator, threads=8, per_thread=5000)
+
+    ids = [order_id for batch in results for order_id in batch]
+    assert len(set(ids)) == len(ids)
+    for batch in results:
+        assert batch == sorted(batch)
+
+
+def test_ids_keep_increasing_when_the_clock_moves_backwards():
+    now = [1700000000.0]
+    generator = OrderIdGenerator(clock=lambda: now[0])
+    first = generator.generate()
+    now[0] -= 5
+    second = generator.generate()
+    assert first < second
+
+
+def user_headers(user_id: str) -> dict:
+    token = jwt.encode(
+        {"sub": user_id, "scope": "pizza:order admin:read", "exp": int(time.time()) + 600},
+        "secret", algorithm="HS256",
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def post_orders(app, requests):
+    """POST every (body, headers) pair concurrently against the app, lifespan included"""
+    async def run():
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+                return await asyncio.gather(*[
+                    client.post("/api/orders", json=body, headers=headers) for body, headers in requests
+                ])
+
+    return asyncio.run(run())
+
+
+BODY = {"items": [{"menu_item_id": 1, "quantity": 2}]}
+
+
+def test_concurrent_orders_with_the_same_items_get_distinct_ids(app, monkeypatch):
+    # Every order in the burst is created within the same second (and millisecond)
+    monkeypatch.setattr(main, "order_id_generator", OrderIdGenerator(clock=lambda: 1700000000.0))
+    responses = post_orders(app, [(BODY, user_headers("burst-user"))] * 25)
+
+    assert [r.status_code for r in responses] == [200] * len(responses)
+    order_ids = [r.json()["order_id"] for r in responses]
+    assert len(set(order_ids)) == len(order_ids)
+
+
+class CollidingGenerator:
+    """Hands out an order ID that is already taken before falling back to fresh ones"""
+
+    def __init__(self, taken: str):
+        self.taken = taken
+        self.fallback = OrderIdGenerator()
+        self.calls = 0
+
+    def generate(self) -> str:
+        self.calls += 1
+        return self.taken if self.calls == 1 else self.fallback.generate()
+
+
+def test_order_id_collision_is_retried_with_a_fresh_id(app, monkeypatch):
+    existing = post_orders(app, [(BODY, user_headers("first-user"))])[0].json()["order_id"]
+
+    for headers in (user_headers("second-user"), {**user_headers("second-user"), "Idempotency-Key": "collide"}):
+        generator = CollidingGenerator(existing)
+        monkeypatch.setattr(main, "order_id_generator", generator)
+        response = post_orders(app, [(BODY, headers)])[0]
+
+        assert response.status_code == 200
+        assert response.json()["order_id"] != existing
+        assert response.headers.get("Idempotent-Replayed") is None
+        assert generator.calls == 2
@@ -0,0 +1,77 @@
+"""
+Bounded LRU cache for verified bearer tokens.
+
+Entries are keyed by the SHA-256 digest of the raw token so tokens are never
+held as dictionary keys, and are dropped once the token's `exp` has passed.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class TokenCache:
+    """
+    Thread-safe LRU cache mapping token digests to verification results.
+
+    `max_ttl` bounds how long an entry is trusted even when the token carries
+    no `exp` claim (or a very distant one).
+    """
+
+    def __init__(self, maxsize: int = 1024, max_ttl: float = 3600):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[Any]:
+        """Return the cached value for a token, or None on a miss or expired entry"""
+        key = self.key_for(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, value: Any, exp: Optional[float] = None) -> None:
+        """Cache a value until the token's `exp` (bounded by `max_ttl`)"""
+        now = time.time()
+        expires_at = now + self.max_ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now or self.maxsize <= 0:
+            return
+        key = self.key_for(token)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }